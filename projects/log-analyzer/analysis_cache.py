@@ -0,0 +1,73 @@
+from array import array
+import hashlib
+import json
+import os
+from typing import Optional, Tuple
+
+CACHE_VERSION = 1
+CACHE_SUFFIX = '.lacache'
+HEAD_BYTES = 4096
+
+def default_cache_path(log_file_path: str) -> str:
+    """Sidecar cache path stored next to the log file"""
+    return log_file_path + CACHE_SUFFIX
+
+def head_hash(log_file_path: str, length: int) -> str:
+    """SHA-1 of the first `length` bytes of a file"""
+    with open(log_file_path, 'rb') as log_file:
+        return hashlib.sha1(log_file.read(length)).hexdigest()
+
+def file_fingerprint(log_file_path: str) -> dict:
+    """Identity of a log file: inode, size, mtime and a hash of its first bytes"""
+    stat = os.stat(log_file_path)
+    head_length = min(stat.st_size, HEAD_BYTES)
+    return {
+        'inode': stat.st_ino,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'head_length': head_length,
+        'head_hash': head_hash(log_file_path, head_length),
+    }
+
+def is_same_file(cached: dict, current: dict, log_file_path: str) -> bool:
+    """
+    True if `current` is the file described by `cached`, possibly with data appended.
+
+    A different inode, a smaller size, a changed head, or a new mtime without
+    any growth means the file was rotated, truncated or rewritten and must be
+    analyzed from scratch.
+    """
+    if cached['inode'] != current['inode'] or cached['size'] > current['size']:
+        return False
+    if cached['size'] == current['size'] and cached['mtime_ns'] != current['mtime_ns']:
+        return False
+    if cached['head_length'] == current['head_length']:
+        return cached['head_hash'] == current['head_hash']
+    return cached['head_hash'] == head_hash(log_file_path, cached['head_length'])
+
+def load_cache(cache_path: str) -> Optional[Tuple[dict, array]]:
+    """
+    Read a sidecar cache written by save_cache.
+
+    Returns the JSON header and the line-offset array, or None if the cache is
+    missing, unreadable or from another version.
+    """
+    try:
+        with open(cache_path, 'rb') as cache_file:
+            header = json.loads(cache_file.readline())
+            offsets = array('Q')
+            offsets.frombytes(cache_file.read())
+    except (OSError, ValueError):
+        return None
+    if header.get('version') != CACHE_VERSION or len(offsets) != header.get('line_count'):
+        return None
+    return header, offsets
+
+def save_cache(cache_path: str, header: dict, offsets: array) -> None:
+    """Atomically write a JSON header line followed by the raw line-offset array"""
+    header = dict(header, version=CACHE_VERSION, line_count=len(offsets))
+    temp_path = cache_path + '.tmp'
+    with open(temp_path, 'wb') as cache_file:
+        cache_file.write(json.dumps(header).encode() + b'\n')
+        offsets.tofile(cache_file)
+    os.replace(temp_path, cache_path)
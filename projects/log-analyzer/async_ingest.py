@@ -0,0 +1,150 @@
+import argparse
+import asyncio
+import sys
+from typing import BinaryIO, Dict, List, Optional, Sequence
+
+from log_analyzer import LogAnalyzer, LogStats, _open_log, expand_log_paths, print_summary
+from log_formats import DEFAULT_FORMAT
+
+STDIN = '-'
+
+class IngestResult:
+    """Per-source and global counts from ingest_sources"""
+    def __init__(self, sources: Sequence[str], message_capacity: Optional[int], group_templates: bool) -> None:
+        self.global_stats = LogStats(message_capacity, group_templates)
+        self.source_stats: Dict[str, LogStats] = {source: LogStats(message_capacity, group_templates) for source in sources}
+        self.malformed_counts: Dict[str, int] = {source: 0 for source in sources}
+
+    def __repr__(self) -> str:
+        return f"IngestResult({len(self.source_stats)} sources, {self.global_stats.total} entries)"
+
+    @property
+    def analyzer(self) -> LogAnalyzer:
+        """LogAnalyzer over the entries of every source"""
+        return LogAnalyzer(stats=self.global_stats)
+
+def _open_source(source: str) -> BinaryIO:
+    if source == STDIN:
+        return sys.stdin.buffer
+    try:
+        return _open_log(source)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Log file provided does not exist: {source}")
+
+async def _read_source(source: str, queue: 'asyncio.Queue', chunk_size: int) -> None:
+    """
+    Read a source in chunks on a worker thread and queue its complete lines.
+
+    Blocking reads run in a thread so slow pipes and large files don't hold up
+    the event loop, and `queue.put` waits whenever the consumer falls behind.
+    """
+    log_file = await asyncio.to_thread(_open_source, source)
+    pending = b''
+    try:
+        while True:
+            chunk = await asyncio.to_thread(log_file.read, chunk_size)
+            if not chunk:
+                break
+            lines = (pending + chunk).split(b'\n')
+            pending = lines.pop()
+            if lines:
+                await queue.put((source, lines))
+        if pending:
+            await queue.put((source, [pending]))
+    finally:
+        if log_file is not sys.stdin.buffer:
+            log_file.close()
+        await queue.put((source, None))
+
+async def _aggregate(queue: 'asyncio.Queue', result: IngestResult, source_count: int) -> None:
+    """Fold queued batches of lines into the per-source stats until every source is done"""
+    parse_line = DEFAULT_FORMAT.parse_bytes
+    remaining = source_count
+    while remaining:
+        source, lines = await queue.get()
+        if lines is None:
+            remaining -= 1
+            continue
+
+        source_add = result.source_stats[source].add
+        for line in lines:
+            try:
+                _, level, message = parse_line(line)
+            except ValueError:
+                result.malformed_counts[source] += 1
+                continue
+            source_add(level, message)
+
+async def ingest(sources: Sequence[str], queue_size: int = 64, chunk_size: int = 1 << 16,
+                 message_capacity: Optional[int] = None, group_templates: bool = False) -> IngestResult:
+    """
+    Read many log files or pipes concurrently into one aggregation.
+
+    Every source gets its own reader task; they share one bounded queue of line
+    batches, so fast sources block instead of buffering unboundedly while the
+    aggregator catches up. Total wall time is bounded by the slowest source
+    rather than the sum of all of them.
+
+    Args:
+        sources: Paths, globs (compressed files are decompressed while
+            streaming) or '-' for stdin
+        queue_size: Maximum number of line batches waiting to be aggregated
+        chunk_size: Bytes read from a source at a time
+        message_capacity: Approximate message counts (see LogStats)
+        group_templates: Count messages by template (see LogStats)
+    """
+    paths = [source for pattern in sources
+             for source in ([pattern] if pattern == STDIN else expand_log_paths(pattern))]
+    result = IngestResult(paths, message_capacity, group_templates)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    readers = [asyncio.create_task(_read_source(path, queue, chunk_size)) for path in paths]
+    aggregator = asyncio.create_task(_aggregate(queue, result, len(paths)))
+    try:
+        await asyncio.gather(*readers)
+        await aggregator
+    except BaseException:
+        for task in [*readers, aggregator]:
+            task.cancel()
+        raise
+    # Batches arrive in whatever order the sources are read, so the global
+    # counts are merged in source order to keep ties the same on every run
+    for stats in result.source_stats.values():
+        result.global_stats.merge(stats)
+    return result
+
+def ingest_sources(sources: Sequence[str], **options) -> IngestResult:
+    """Synchronous wrapper around ingest()"""
+    return asyncio.run(ingest(sources, **options))
+
+def print_source_table(result: IngestResult, levels: List[str]) -> None:
+    """Print one row of level counts per source"""
+    width = max([len(source) for source in result.source_stats] + [6])
+    print(f"{'source':<{width}} " + ' '.join(f"{level:>9}" for level in levels) + f" {'malformed':>9}")
+    for source, stats in result.source_stats.items():
+        counts = ' '.join(f"{stats.level_counts.get(level, 0):>9}" for level in levels)
+        print(f"{source:<{width}} {counts} {result.malformed_counts[source]:>9}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Analyze many log files or pipes concurrently.')
+    parser.add_argument('sources', nargs='+', help="Paths or globs of log files, or '-' for stdin")
+    parser.add_argument('--top', type=int, help='Return top n log messages', default=5)
+    parser.add_argument('--queue-size', type=int, help='Maximum line batches waiting to be aggregated', default=64)
+    parser.add_argument('--approx-top', type=int, metavar='CAPACITY', default=None,
+                        help='Approximate message counts, tracking at most CAPACITY distinct messages')
+    parser.add_argument('--templates', action='store_true',
+                        help='Group messages into templates, masking numbers, hex ids, UUIDs and IPs')
+
+    args = parser.parse_args()
+
+    result = ingest_sources(args.sources, queue_size=args.queue_size, message_capacity=args.approx_top,
+                            group_templates=args.templates)
+
+    print_source_table(result, list(result.global_stats.level_counts))
+    for source, stats in result.source_stats.items():
+        print(f"\n{source}:")
+        for msg, cnt in stats.top_messages(args.top):
+            print(f"  {cnt:3d}x - {msg}")
+
+    print("\nAll sources:")
+    print_summary(result.analyzer, args.top)
@@ -0,0 +1,181 @@
+"""
+Throughput and peak-memory benchmarks for the log analyzer.
+
+Generates (or reuses) a synthetic log file, then times LogParser construction,
+snapshot saving and reloading, each LogAnalyzer method and the CLI end to end.
+Results are printed as a table and can be written as JSON and compared against
+a previous run:
+
+    python benchmarks/bench_log_analyzer.py --lines 2000000 --output results.json
+    python benchmarks/bench_log_analyzer.py --lines 2000000 --compare results.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+sys.path.insert(0, os.path.join(PROJECT_DIR, 'sample_data'))
+
+from create_sample_logs import write_sample_logs
+from log_analyzer import LogAnalyzer, LogParser, analyze_file_parallel
+
+CLI_PATH = os.path.join(PROJECT_DIR, 'log_analyzer.py')
+
+def measure(name: str, func: Callable[[], object], lines: int, size: int, repeat: int = 3,
+            track_memory: bool = True) -> Dict[str, object]:
+    """
+    Time func (best of `repeat` runs) and, in a separate run, its peak traced memory.
+
+    Memory is measured apart from timing because tracemalloc slows allocation-heavy
+    code down considerably.
+    """
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    seconds = min(timings)
+
+    peak = None
+    if track_memory:
+        gc.collect()
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {
+        'name': name,
+        'seconds': seconds,
+        'lines_per_second': lines / seconds if seconds else None,
+        'mb_per_second': size / 1e6 / seconds if seconds else None,
+        'peak_memory_mb': peak / 1e6 if peak is not None else None,
+    }
+
+def measure_cli(log_path: str, lines: int, size: int, extra_args: List[str], repeat: int) -> Dict[str, object]:
+    """Run the CLI in a child process and report its wall time and max RSS"""
+    # The child reports its own max RSS so earlier children don't skew it
+    runner = (
+        "import resource, runpy, sys\n"
+        "sys.argv = sys.argv[1:]\n"
+        "runpy.run_path(sys.argv[0], run_name='__main__')\n"
+        "sys.stderr.write(str(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))\n"
+    )
+    timings, max_rss_kb = [], 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-c', runner, CLI_PATH, log_path, *extra_args],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=True, text=True)
+        timings.append(time.perf_counter() - start)
+        max_rss_kb = max(max_rss_kb, int(result.stderr.strip().splitlines()[-1]))
+    seconds = min(timings)
+    return {
+        'name': ' '.join(['cli', *extra_args]),
+        'seconds': seconds,
+        'lines_per_second': lines / seconds,
+        'mb_per_second': size / 1e6 / seconds,
+        'peak_memory_mb': max_rss_kb / 1e3,
+    }
+
+def run_benchmarks(log_path: str, lines: int, repeat: int, workers: int) -> List[Dict[str, object]]:
+    size = os.path.getsize(log_path)
+    results = [
+        measure('LogParser()', lambda: LogParser(log_path), lines, size, repeat),
+        measure('LogParser(lazy=True)', lambda: LogParser(log_path, lazy=True).close(), lines, size, repeat),
+    ]
+
+    log_parser = LogParser(log_path)
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        snapshot_path = os.path.join(snapshot_dir, 'bench.lasnap')
+        results.append(measure('LogParser.save_snapshot()', lambda: log_parser.save_snapshot(snapshot_path),
+                               lines, size, repeat, track_memory=False))
+        results.append(measure('LogParser.from_snapshot() + stats',
+                               lambda: LogAnalyzer(LogParser.from_snapshot(snapshot_path)).stats, lines, size, repeat))
+
+    first_timestamp = log_parser[0].timestamp
+    analyzer_benchmarks = {
+        'LogAnalyzer.stats': lambda analyzer: analyzer.stats,
+        'LogAnalyzer.log_levels': lambda analyzer: analyzer.log_levels,
+        'LogAnalyzer.top_messages(10)': lambda analyzer: analyzer.top_messages(10),
+        'LogAnalyzer.most_common_log_message': lambda analyzer: analyzer.most_common_log_message,
+        'LogAnalyzer.top_templates(10)': lambda analyzer: analyzer.top_templates(10),
+        'LogAnalyzer.filter_by_level(ERROR)': lambda analyzer: analyzer.filter_by_level('ERROR'),
+        'LogAnalyzer.level_histogram(hour)': lambda analyzer: analyzer.level_histogram('hour'),
+        'LogAnalyzer.time_slice(1h)': lambda analyzer: analyzer.time_slice(first_timestamp, log_parser.epochs[0] + 3600),
+    }
+    for name, method in analyzer_benchmarks.items():
+        # A fresh analyzer per run so every method pays for its own aggregation
+        results.append(measure(name, lambda: method(LogAnalyzer(log_parser)), lines, size, repeat))
+
+    results.append(measure(f'analyze_file_parallel(workers={workers})',
+                           lambda: analyze_file_parallel(log_path, workers), lines, size, repeat, track_memory=False))
+    results.append(measure_cli(log_path, lines, size, [], repeat))
+    results.append(measure_cli(log_path, lines, size, ['--workers', str(workers)], repeat))
+    return results
+
+def print_results(results: List[Dict[str, object]], baseline: Optional[Dict[str, Dict[str, object]]] = None) -> None:
+    header = f"{'benchmark':<42} {'seconds':>9} {'lines/s':>12} {'MB/s':>8} {'peak MB':>9}"
+    if baseline:
+        header += f" {'speedup':>8}"
+    print(header)
+    print('-' * len(header))
+    for result in results:
+        peak = result['peak_memory_mb']
+        row = (f"{result['name']:<42} {result['seconds']:>9.4f} {result['lines_per_second']:>12,.0f} "
+               f"{result['mb_per_second']:>8.1f} {peak if peak is not None else float('nan'):>9.1f}")
+        previous = (baseline or {}).get(result['name'])
+        if previous:
+            row += f" {previous['seconds'] / result['seconds']:>7.2f}x"
+        print(row)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the log analyzer.')
+    parser.add_argument('--input', help='Existing log file to benchmark instead of generating one')
+    parser.add_argument('--lines', type=int, default=1_000_000, help='Lines to generate')
+    parser.add_argument('--seed', type=int, default=42, help='Generator seed')
+    parser.add_argument('--cardinality', type=int, default=1000, help='Distinct messages per level')
+    parser.add_argument('--zipf', type=float, default=1.1, help='Message skew')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per benchmark; the fastest is reported')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Workers for the parallel benchmarks')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--compare', help='JSON results from an earlier run to compare against')
+
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        log_path = args.input
+        if log_path is None:
+            log_path = os.path.join(temp_dir, 'bench.log')
+            write_sample_logs(log_path, args.lines, seed=args.seed, cardinality=args.cardinality, zipf=args.zipf)
+        with open(log_path, 'rb') as log_file:
+            lines = sum(1 for _ in log_file)
+
+        results = run_benchmarks(log_path, lines, args.repeat, args.workers)
+
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'lines': lines,
+        'generator': None if args.input else {'seed': args.seed, 'cardinality': args.cardinality, 'zipf': args.zipf},
+        'results': results,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as compare_file:
+            baseline = {result['name']: result for result in json.load(compare_file)['results']}
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(report, output_file, indent=2)
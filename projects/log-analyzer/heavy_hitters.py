@@ -0,0 +1,125 @@
+import heapq
+from typing import Dict, Hashable, List, Tuple
+
+class SpaceSaving:
+    """
+    Bounded-memory approximate counter for the most frequent items in a stream.
+
+    Implements the Space-Saving algorithm: at most `capacity` items are tracked.
+    When a new item arrives and the table is full, the item with the smallest
+    count is evicted and the newcomer inherits that count as its error. Every
+    reported count overestimates the true count by at most its error, and any
+    item with a true count above total / capacity is guaranteed to be tracked.
+    """
+    def __init__(self, capacity: int) -> None:
+        if capacity < 1:
+            raise ValueError(f"Capacity must be at least 1, not {capacity}")
+        self.capacity = capacity
+        self.total = 0
+        self._counts: Dict[Hashable, int] = {}
+        self._errors: Dict[Hashable, int] = {}
+        # Min-heap of (count, item); entries go stale when an item's count grows
+        # and are skipped when popped, so increments never search the heap.
+        self._heap: List[Tuple[int, Hashable]] = []
+
+    def __repr__(self) -> str:
+        return f"SpaceSaving(capacity={self.capacity}, tracked={len(self._counts)}, total={self.total})"
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def __contains__(self, item: Hashable) -> bool:
+        return item in self._counts
+
+    def add(self, item: Hashable, count: int = 1) -> None:
+        """Count `count` more occurrences of item"""
+        self.total += count
+        counts = self._counts
+        if item in counts:
+            counts[item] += count
+        elif len(counts) < self.capacity:
+            counts[item] = count
+            self._errors[item] = 0
+        else:
+            evicted, floor = self._pop_min()
+            del counts[evicted]
+            del self._errors[evicted]
+            counts[item] = floor + count
+            self._errors[item] = floor
+
+        heapq.heappush(self._heap, (counts[item], item))
+        if len(self._heap) > 4 * self.capacity:
+            self._rebuild_heap()
+
+    def count(self, item: Hashable) -> int:
+        """Estimated count of item (0 if it isn't tracked)"""
+        return self._counts.get(item, 0)
+
+    def error(self, item: Hashable) -> int:
+        """Maximum overestimate in count(item)"""
+        return self._errors.get(item, 0)
+
+    @property
+    def error_bound(self) -> int:
+        """Upper bound on the overestimate of any reported count"""
+        return max(self._errors.values(), default=0)
+
+    def top(self, n: int) -> List[Tuple[Hashable, int, int]]:
+        """Returns the n items with the highest estimated counts as (item, count, error)"""
+        items = heapq.nlargest(n, self._counts.items(), key=lambda x: x[1])
+        return [(item, count, self._errors[item]) for item, count in items]
+
+    def merge(self, other: 'SpaceSaving') -> 'SpaceSaving':
+        """
+        Fold another summary into this one.
+
+        An item missing from a full summary may still have occurred up to that
+        summary's minimum count times, so the minimum is added to both its
+        count and its error before the largest `capacity` items are kept. Items
+        are merged in a fixed order, this summary's first and then the other's
+        new ones, so equal counts are kept the same way on every run.
+        """
+        own_floor = self._floor()
+        other_floor = other._floor()
+        merged = {}
+        for item in [*self._counts, *(item for item in other._counts if item not in self._counts)]:
+            count = self._counts.get(item, own_floor) + other._counts.get(item, other_floor)
+            error = self._errors.get(item, own_floor) + other._errors.get(item, other_floor)
+            merged[item] = (count, error)
+
+        kept = heapq.nlargest(self.capacity, merged.items(), key=lambda x: x[1][0])
+        self._counts = {item: count for item, (count, _) in kept}
+        self._errors = {item: error for item, (_, error) in kept}
+        self.total += other.total
+        self._rebuild_heap()
+        return self
+
+    def to_dict(self) -> dict:
+        """JSON-serialisable state; items must be strings"""
+        return {'capacity': self.capacity, 'total': self.total, 'counts': self._counts, 'errors': self._errors}
+
+    @classmethod
+    def from_dict(cls, state: dict) -> 'SpaceSaving':
+        sketch = cls(state['capacity'])
+        sketch.total = state['total']
+        sketch._counts = dict(state['counts'])
+        sketch._errors = dict(state['errors'])
+        sketch._rebuild_heap()
+        return sketch
+
+    def _floor(self) -> int:
+        """Smallest tracked count once the table is full, else 0"""
+        if len(self._counts) < self.capacity:
+            return 0
+        return min(self._counts.values())
+
+    def _pop_min(self) -> Tuple[Hashable, int]:
+        heap = self._heap
+        while True:
+            count, item = heapq.heappop(heap)
+            if self._counts.get(item) == count:
+                return item, count
+
+    def _rebuild_heap(self) -> None:
+        self._heap = [(count, item) for item, count in self._counts.items()]
+        heapq.heapify(self._heap)
@@ -0,0 +1,138 @@
+from collections import defaultdict
+from contextlib import contextmanager
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterator, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+class StageRecord:
+    """Accumulated time and volume for one pipeline stage"""
+    __slots__ = ('name', 'seconds', 'lines', 'bytes', 'calls', 'peak_memory')
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.seconds = 0.0
+        self.lines = 0
+        self.bytes = 0
+        self.calls = 0
+        self.peak_memory: Optional[int] = None
+
+    def __repr__(self) -> str:
+        return f"StageRecord({self.name}: {self.seconds:.4f}s, {self.lines} lines, {self.bytes} bytes)"
+
+    @property
+    def lines_per_second(self) -> Optional[float]:
+        return self.lines / self.seconds if self.lines and self.seconds else None
+
+    @property
+    def mb_per_second(self) -> Optional[float]:
+        return self.bytes / 1e6 / self.seconds if self.bytes and self.seconds else None
+
+class Instrumentation:
+    """
+    Collects per-stage timings and counters from LogParser, LogAnalyzer and the CLI.
+
+    Components only touch the instrumentation at stage boundaries (never per
+    line), and skip it entirely when none is passed in, so leaving it off costs
+    nothing.
+
+    Args:
+        on_stage: Hook called with the StageRecord every time a stage finishes
+        trace_memory: Also record each stage's peak traced Python memory
+            (tracemalloc slows allocation-heavy stages down noticeably)
+    """
+    def __init__(self, on_stage: Optional[Callable[[StageRecord], None]] = None, trace_memory: bool = False) -> None:
+        self.stages: Dict[str, StageRecord] = {}
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.on_stage = on_stage
+        self.trace_memory = trace_memory
+
+    def __repr__(self) -> str:
+        return f"Instrumentation({list(self.stages)})"
+
+    def _stage_record(self, name: str) -> StageRecord:
+        record = self.stages.get(name)
+        if record is None:
+            record = self.stages[name] = StageRecord(name)
+        return record
+
+    @contextmanager
+    def stage(self, name: str, lines: int = 0, bytes: int = 0) -> Iterator[StageRecord]:
+        """
+        Time a block as one call of stage `name`.
+
+        The yielded record can be updated inside the block once the number of
+        lines or bytes processed is known.
+        """
+        record = self._stage_record(name)
+        record.lines += lines
+        record.bytes += bytes
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.seconds += time.perf_counter() - start
+            record.calls += 1
+            if self.trace_memory:
+                record.peak_memory = max(record.peak_memory or 0, tracemalloc.get_traced_memory()[1])
+            if started_tracing:
+                tracemalloc.stop()
+            if self.on_stage is not None:
+                self.on_stage(record)
+
+    def add_time(self, name: str, seconds: float, lines: int = 0, bytes: int = 0) -> None:
+        """Add time measured elsewhere to a stage, e.g. I/O interleaved with parsing"""
+        record = self._stage_record(name)
+        record.seconds += seconds
+        record.lines += lines
+        record.bytes += bytes
+        record.calls += 1
+        if self.on_stage is not None:
+            self.on_stage(record)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] += amount
+
+    @staticmethod
+    def _max_rss_mb(who: int) -> float:
+        max_rss = resource.getrusage(who).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+        return max_rss / 1e6 if sys.platform == 'darwin' else max_rss / 1e3
+
+    @property
+    def peak_rss_mb(self) -> Optional[float]:
+        """Peak resident memory of this process so far"""
+        return self._max_rss_mb(resource.RUSAGE_SELF) if resource is not None else None
+
+    @property
+    def peak_worker_rss_mb(self) -> Optional[float]:
+        """Peak resident memory of the largest finished child process, e.g. a parallel worker"""
+        return self._max_rss_mb(resource.RUSAGE_CHILDREN) if resource is not None else None
+
+    def report(self) -> str:
+        """Human-readable table of stages and counters"""
+        rows = [f"{'stage':<24} {'seconds':>9} {'calls':>6} {'lines/s':>12} {'MB/s':>8} {'peak MB':>8}"]
+        for record in self.stages.values():
+            lines_per_second = f"{record.lines_per_second:,.0f}" if record.lines_per_second else '-'
+            mb_per_second = f"{record.mb_per_second:.1f}" if record.mb_per_second else '-'
+            peak = f"{record.peak_memory / 1e6:.1f}" if record.peak_memory is not None else '-'
+            rows.append(f"{record.name:<24} {record.seconds:>9.4f} {record.calls:>6} "
+                        f"{lines_per_second:>12} {mb_per_second:>8} {peak:>8}")
+        for name, value in self.counters.items():
+            rows.append(f"{name}: {value}")
+        if self.peak_rss_mb is not None:
+            rows.append(f"peak RSS: {self.peak_rss_mb:.1f} MB")
+        if self.peak_worker_rss_mb:
+            rows.append(f"peak child process RSS: {self.peak_worker_rss_mb:.1f} MB")
+        return '\n'.join(rows)
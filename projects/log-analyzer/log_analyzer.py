@@ -1,11 +1,50 @@
-from collections import defaultdict
+from array import array
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+import bz2
+import glob
+import gzip
+import heapq
+import lzma
+import math
+import mmap
+import os
+import re
+import sys
+import time
 import argparse
-from typing import List, Iterator, Union, overload
+import cProfile
+import pstats
+from operator import itemgetter
+from typing import AbstractSet, BinaryIO, Callable, Dict, FrozenSet, Iterable, List, Iterator, Optional, Sequence, Tuple, Union, overload
+
+from analysis_cache import CACHE_SUFFIX, default_cache_path, file_fingerprint, is_same_file, load_cache, save_cache
+from heavy_hitters import SpaceSaving
+from instrumentation import Instrumentation
+from log_formats import DEFAULT_FORMAT, LogFormat, available_formats, detect_format, get_format
+from message_templates import TemplateMiner
+from snapshot import Snapshot, SNAPSHOT_SUFFIX, write_snapshot
 
 class LogEntry:
-    def __init__(self, log_entry: str) -> None:
-        self._log_entry = log_entry
-        self.parse_log()
+    __slots__ = ('timestamp', 'level', 'message')
+
+    def __init__(self, log_entry: str, log_format: Optional[LogFormat] = None) -> None:
+        if log_format is None:
+            self.timestamp, self.level, self.message = self.parse_log(log_entry)
+        else:
+            self.timestamp, self.level, self.message = log_format.parse(log_entry)
+
+    @classmethod
+    def from_fields(cls, timestamp: str, level: str, message: str) -> 'LogEntry':
+        """Build an entry from already parsed fields without re-parsing a line"""
+        entry = cls.__new__(cls)
+        entry.timestamp = timestamp
+        entry.level = level
+        entry.message = message
+        return entry
 
     def __repr__(self) -> str:
         return f"LogEntry(TIMESTAMP={self.timestamp}, LEVEL={self.level}, MESSAGE={self.message})"
@@ -13,123 +52,1583 @@ class LogEntry:
     def __eq__(self, other):
         return self.timestamp == other.timestamp and self.level == other.level and self.message == other.message
     
-    def parse_log(self):
-        parts = self._log_entry.split(' ')
-        if len(parts) < 4:
-            raise ValueError(f"Malformed log entry: {self._log_entry}")
-        
-        self.timestamp = parts[0] + ' ' + parts[1]
-        self.level = parts[2]
-        self.message = ' '.join(parts[3:])
+    @staticmethod
+    def parse_log(log_entry: str) -> Tuple[str, str, str]:
+        """Split a line of the default layout into (timestamp, level, message)"""
+        return DEFAULT_FORMAT.parse(log_entry)
+
+_template_miner = TemplateMiner()
+
+_EPOCH = datetime(1970, 1, 1)
+_BUCKET_SECONDS = {'minute': 60, 'hour': 3600, 'day': 86400}
+
+def _timestamp_to_epoch(timestamp: str) -> float:
+    """Convert a log timestamp to seconds since the epoch, or NaN if it can't be parsed"""
+    try:
+        parsed = datetime.fromisoformat(timestamp)
+    except ValueError:
+        return math.nan
+    if parsed.tzinfo is not None:
+        return parsed.timestamp()
+    return (parsed - _EPOCH).total_seconds()
+
+def _epoch_to_timestamp(epoch: float) -> str:
+    return (_EPOCH + timedelta(seconds=epoch)).strftime('%Y-%m-%d %H:%M:%S')
+
+def _to_epoch(moment: Union[str, datetime, float]) -> float:
+    """Accept a timestamp string, datetime or epoch seconds for time range queries"""
+    if isinstance(moment, (int, float)):
+        return float(moment)
+    epoch = _timestamp_to_epoch(moment.isoformat() if isinstance(moment, datetime) else moment)
+    if math.isnan(epoch):
+        raise ValueError(f"Invalid timestamp: {moment}")
+    return epoch
+
+def _merge_postings(postings: List[Sequence[int]], start: int = 0, stop: Optional[int] = None) -> Iterable[int]:
+    """Merge sorted posting lists, keeping only the indices in [start, stop)"""
+    if start or stop is not None:
+        # Posting lists are sorted, so the bounds are found by bisection
+        postings = [map(posting.__getitem__, range(bisect_left(posting, start),
+                                                   len(posting) if stop is None else bisect_left(posting, stop)))
+                    for posting in postings]
+    if len(postings) == 1:
+        return postings[0]
+    return heapq.merge(*postings)
+
+_MAX_SHORT_CODE = 0xFFFF
+
+class _ColumnStore:
+    """
+    Parsed log entries stored column by column.
+
+    Levels are kept as small integer codes (16-bit, widened to 32-bit if a file
+    has more than 65,536 distinct levels) and timestamps/messages are interned,
+    so repeated values share a single string object. LogEntry objects are only
+    built when an entry is accessed. For each level a posting list of the
+    entry indices with that level is kept, so level filters never visit
+    entries of other levels.
+    """
+    def __init__(self) -> None:
+        self.timestamps = []
+        self.level_codes = array('H')
+        self.messages = []
+        self.level_names = []
+        self.level_postings = []
+        self._level_lookup = {}
+        self._strings = {}
+
+    def __len__(self) -> int:
+        return len(self.level_codes)
+
+    def _add_level(self, level: str) -> int:
+        code = self._level_lookup.get(level)
+        if code is None:
+            code = self._level_lookup[level] = len(self.level_names)
+            self.level_names.append(level)
+            self.level_postings.append(array('Q'))
+            if code == _MAX_SHORT_CODE + 1:
+                self.level_codes = array('I', self.level_codes)
+        return code
+
+    def append(self, timestamp: str, level: str, message: str) -> None:
+        code = self._add_level(level)
+        intern = self._strings.setdefault
+        self.level_postings[code].append(len(self.level_codes))
+        self.timestamps.append(intern(timestamp, timestamp))
+        self.level_codes.append(code)
+        self.messages.append(intern(message, message))
+
+    def extend_raw(self, lines: Iterable[bytes], skip_malformed: bool = False) -> int:
+        """
+        Parse raw bytes lines of the default layout and append them, returning the number of malformed lines skipped.
+
+        Lines go through DEFAULT_FORMAT.parse_bytes. Its cache of decoded strings
+        is bounded and shared, so timestamps and messages are still interned
+        here like in append(): a message repeated after that cache was emptied
+        shares the store's string instead of keeping a copy. A timestamp is
+        only looked up when it differs from the previous line's.
+        """
+        parse_line = DEFAULT_FORMAT.parse_bytes
+        intern = self._strings.setdefault
+        timestamps_append = self.timestamps.append
+        codes_append = self.level_codes.append
+        messages_append = self.messages.append
+        level_lookup = self._level_lookup
+        postings = self.level_postings
+        index = len(self.level_codes)
+        last_timestamp = None
+        malformed = 0
+        for line in lines:
+            try:
+                timestamp, level, message = parse_line(line)
+            except ValueError:
+                if not skip_malformed:
+                    raise
+                malformed += 1
+                continue
+            code = level_lookup.get(level)
+            if code is None:
+                code = self._add_level(level)
+                codes_append = self.level_codes.append
+            if timestamp is not last_timestamp:
+                last_timestamp = timestamp = intern(timestamp, timestamp)
+            message = intern(message, message)
+
+            timestamps_append(timestamp)
+            codes_append(code)
+            messages_append(message)
+            postings[code].append(index)
+            index += 1
+        return malformed
+
+    def extend_parsed(self, lines: Iterable[bytes], parse_line: Callable[[bytes], Tuple[str, str, str]],
+                      skip_malformed: bool = False) -> int:
+        """Parse lines with a log format's parser and append them, returning the number of malformed lines skipped"""
+        append = self.append
+        malformed = 0
+        for line in lines:
+            try:
+                fields = parse_line(line)
+            except ValueError:
+                if not skip_malformed:
+                    raise
+                malformed += 1
+                continue
+            append(*fields)
+        return malformed
+
+    def iter_timestamps(self) -> Iterator[str]:
+        return iter(self.timestamps)
+
+    def indices_with_levels(self, levels: AbstractSet[str], start: int = 0, stop: Optional[int] = None) -> Iterable[int]:
+        """Indices in [start, stop) of the entries whose level is in levels, in file order"""
+        return _merge_postings([self.level_postings[self._level_lookup[level]]
+                                for level in levels if level in self._level_lookup], start, stop)
+
+    def entry(self, index: int) -> LogEntry:
+        return LogEntry.from_fields(self.timestamps[index], self.level_names[self.level_codes[index]], self.messages[index])
+
+class _LineIndex:
+    """
+    Byte offsets of every line in a memory-mapped log file.
+
+    Only the offsets are built up front; a line is decoded and parsed into a
+    LogEntry each time it is accessed. Offsets already known for the first
+    `indexed_size` bytes (e.g. from a sidecar cache) can be passed in, and only
+    the rest of the file is scanned.
+    """
+    def __init__(self, log_file_path: str, offsets: Optional[array] = None, indexed_size: int = 0,
+                 log_format: LogFormat = DEFAULT_FORMAT) -> None:
+        try:
+            self._file = open(log_file_path, 'rb')
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Log file provided does not exist: {log_file_path}")
+
+        self._size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self._size else b''
+        self.offsets = array('Q') if offsets is None else offsets
+        self._log_format = log_format
+        self._parse_line = log_format.parse_bytes
+
+        append = self.offsets.append
+        find = self._map.find
+        position = indexed_size
+        while position < self._size:
+            append(position)
+            end = find(b'\n', position)
+            if end == -1:
+                break
+            position = end + 1
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def raw_line(self, index: int) -> bytes:
+        start = self.offsets[index]
+        end = self.offsets[index + 1] if index + 1 < len(self.offsets) else self._size
+        return self._map[start:end]
+
+    def iter_timestamps(self) -> Iterator[str]:
+        parse_line = self._log_format.parse_bytes
+        for index in range(len(self.offsets)):
+            yield parse_line(self.raw_line(index))[0]
+
+    def entry(self, index: int) -> LogEntry:
+        return LogEntry.from_fields(*self._parse_line(self.raw_line(index)))
+
+    def close(self) -> None:
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+class _SnapshotMessages:
+    """Message column of a snapshot, decoding each distinct message once"""
+    def __init__(self, snapshot: Snapshot) -> None:
+        self._ids = snapshot.message_ids
+        self._message = snapshot.message
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, index: int) -> str:
+        return self._message(self._ids[index])
+
+class _SnapshotStore:
+    """
+    Entries served from a memory-mapped snapshot written by LogParser.save_snapshot.
+
+    Has the same columns as _ColumnStore, but they are views into the map, so
+    loading costs nothing up front. Timestamps are rendered from the epoch
+    column unless the snapshot kept the original text.
+    """
+    def __init__(self, snapshot_path: str) -> None:
+        self.snapshot = Snapshot(snapshot_path)
+        self.level_names = self.snapshot.level_names
+        self.level_codes = self.snapshot.level_codes
+        self.messages = _SnapshotMessages(self.snapshot)
+        self.epochs = self.snapshot.epochs
+        self._level_lookup = {level: code for code, level in enumerate(self.level_names)}
+        self._has_overrides = self.snapshot.has_timestamp_overrides
+        self._day, self._date = None, ''
+
+    def __len__(self) -> int:
+        return len(self.snapshot)
+
+    def _timestamp(self, index: int) -> str:
+        if self._has_overrides:
+            timestamp = self.snapshot.timestamp_override(index)
+            if timestamp is not None:
+                return timestamp
+        # Without an override the timestamp is canonical and whole seconds, so
+        # only the date part needs strftime, once per day
+        day, second = divmod(int(self.epochs[index]), 86400)
+        if day != self._day:
+            self._day, self._date = day, _epoch_to_timestamp(day * 86400)[:11]
+        hours, second = divmod(second, 3600)
+        return f"{self._date}{hours:02d}:{second // 60:02d}:{second % 60:02d}"
+
+    def iter_timestamps(self) -> Iterator[str]:
+        return map(self._timestamp, range(len(self)))
+
+    def indices_with_levels(self, levels: AbstractSet[str], start: int = 0, stop: Optional[int] = None) -> Iterable[int]:
+        """Indices in [start, stop) of the entries whose level is in levels, in file order"""
+        return _merge_postings([self.snapshot.posting(self._level_lookup[level])
+                                for level in levels if level in self._level_lookup], start, stop)
+
+    def entry(self, index: int) -> LogEntry:
+        return LogEntry.from_fields(self._timestamp(index), self.level_names[self.level_codes[index]], self.messages[index])
+
+    def close(self) -> None:
+        self.snapshot.close()
+
+_COMPRESSED_OPENERS = {'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open, '.lzma': lzma.open}
+
+def _is_compressed(log_file_path: str) -> bool:
+    return os.path.splitext(log_file_path)[1] in _COMPRESSED_OPENERS
+
+def _open_log(log_file_path: str) -> BinaryIO:
+    """Open a log file for reading bytes, decompressing gzip/bz2/xz files as a stream"""
+    opener = _COMPRESSED_OPENERS.get(os.path.splitext(log_file_path)[1])
+    if opener is None:
+        return open(log_file_path, 'rb')
+    return opener(log_file_path, 'rb')
+
+def _timed_lines(log_file: BinaryIO, read_totals: List[float], chunk_size: int = 1 << 20) -> Iterator[bytes]:
+    """
+    Yield the lines of a file read in large chunks, adding the read time and bytes to read_totals.
+
+    Timing each chunk rather than each line keeps I/O (and decompression)
+    separable from parsing without a per-line clock call.
+    """
+    pending = b''
+    while True:
+        start = time.perf_counter()
+        chunk = log_file.read(chunk_size)
+        read_totals[0] += time.perf_counter() - start
+        read_totals[1] += len(chunk)
+        if not chunk:
+            break
+        lines = (pending + chunk).split(b'\n')
+        pending = lines.pop()
+        yield from lines
+    if pending:
+        yield pending
+
+def _stage(instrumentation: Optional[Instrumentation], name: str, lines: int = 0, bytes: int = 0):
+    """Instrumentation stage context, or a no-op context when instrumentation is off"""
+    if instrumentation is None:
+        return nullcontext()
+    return instrumentation.stage(name, lines, bytes)
+
+_SIDECAR_SUFFIXES = (CACHE_SUFFIX, SNAPSHOT_SUFFIX, '.tmp')
+
+def _rotation_key(log_file_path: str) -> Tuple[int, str]:
+    """Sort key placing rotated files oldest first: app.log.2.bz2, app.log.1.gz, app.log"""
+    name = log_file_path
+    if _is_compressed(name):
+        name = os.path.splitext(name)[0]
+    suffix = os.path.splitext(name)[1][1:]
+    return (-int(suffix) if suffix.isdigit() else 0, log_file_path)
+
+def expand_log_paths(log_file_paths: Union[str, Sequence[str]]) -> List[str]:
+    """
+    Expand a path, glob or list of them into the log files to read, in order.
+
+    Files matched by a glob are ordered oldest rotation first. The analysis
+    caches, snapshots and temporary files written next to the logs are
+    skipped, whether a glob matched them or the shell already expanded it,
+    and a ValueError is raised if nothing else is left. A path that matches
+    nothing is kept as is so opening it reports the missing file.
+    """
+    if isinstance(log_file_paths, str):
+        log_file_paths = [log_file_paths]
+
+    expanded = []
+    for pattern in log_file_paths:
+        if glob.has_magic(pattern):
+            matches = [match for match in glob.glob(pattern) if not match.endswith(_SIDECAR_SUFFIXES)]
+            expanded.extend(sorted(matches, key=_rotation_key) if matches else [pattern])
+        elif not pattern.endswith(_SIDECAR_SUFFIXES):
+            expanded.append(pattern)
+    if log_file_paths and not expanded:
+        raise ValueError(f"No log files to read, only caches, snapshots or temporary files: {', '.join(log_file_paths)}")
+    return expanded
+
+class Query:
+    """
+    A predicate over log entries, built from LevelIn, TimeRange, Contains and
+    Matches and combined with & (and), | (or) and ~ (not).
+
+    A query is compiled once into a plain function of (epoch, level, message),
+    so evaluating it per entry costs no attribute lookups or re-parsing.
+    """
+    uses_time = False
+
+    def __and__(self, other: 'Query') -> 'Query':
+        return _And(self, other)
+
+    def __or__(self, other: 'Query') -> 'Query':
+        return _Or(self, other)
+
+    def __invert__(self) -> 'Query':
+        return _Not(self)
+
+    def compile(self) -> Callable[[float, str, str], bool]:
+        raise NotImplementedError
+
+    def candidate_levels(self, all_levels: Iterable[str]) -> Optional[FrozenSet[str]]:
+        """The only levels a matching entry can have, or None if any level can match"""
+        return None
+
+    @property
+    def levels_only(self) -> bool:
+        """True if the query looks at nothing but the level"""
+        return False
+
+class LevelIn(Query):
+    def __init__(self, *levels: str) -> None:
+        self.levels = frozenset(levels)
+
+    def __repr__(self) -> str:
+        return f"LevelIn({', '.join(sorted(self.levels))})"
+
+    def compile(self) -> Callable[[float, str, str], bool]:
+        levels = self.levels
+        return lambda epoch, level, message: level in levels
+
+    def candidate_levels(self, all_levels: Iterable[str]) -> Optional[FrozenSet[str]]:
+        return self.levels
+
+    @property
+    def levels_only(self) -> bool:
+        return True
+
+class TimeRange(Query):
+    """Entries with start <= timestamp < end; either bound may be None"""
+    uses_time = True
+
+    def __init__(self, start: Union[str, datetime, float, None] = None, end: Union[str, datetime, float, None] = None) -> None:
+        self.start = _to_epoch(start) if start is not None else -math.inf
+        self.end = _to_epoch(end) if end is not None else math.inf
+
+    def __repr__(self) -> str:
+        return f"TimeRange({self.start}, {self.end})"
+
+    def compile(self) -> Callable[[float, str, str], bool]:
+        start, end = self.start, self.end
+        return lambda epoch, level, message: start <= epoch < end
+
+class Contains(Query):
+    """Entries whose message contains text"""
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+    def __repr__(self) -> str:
+        return f"Contains({self.text!r})"
+
+    def compile(self) -> Callable[[float, str, str], bool]:
+        text = self.text
+        return lambda epoch, level, message: text in message
+
+class Matches(Query):
+    """Entries whose message matches a regular expression (re.search)"""
+    def __init__(self, pattern: Union[str, 're.Pattern[str]']) -> None:
+        self.pattern = re.compile(pattern)
+
+    def __repr__(self) -> str:
+        return f"Matches({self.pattern.pattern!r})"
+
+    def compile(self) -> Callable[[float, str, str], bool]:
+        search = self.pattern.search
+        return lambda epoch, level, message: search(message) is not None
+
+class _And(Query):
+    def __init__(self, left: Query, right: Query) -> None:
+        self.left, self.right = left, right
+        self.uses_time = left.uses_time or right.uses_time
+
+    def __repr__(self) -> str:
+        return f"({self.left!r} & {self.right!r})"
+
+    def compile(self) -> Callable[[float, str, str], bool]:
+        left, right = self.left.compile(), self.right.compile()
+        return lambda epoch, level, message: left(epoch, level, message) and right(epoch, level, message)
+
+    def candidate_levels(self, all_levels: Iterable[str]) -> Optional[FrozenSet[str]]:
+        all_levels = list(all_levels)
+        left = self.left.candidate_levels(all_levels)
+        right = self.right.candidate_levels(all_levels)
+        if left is None or right is None:
+            return left if right is None else right
+        return left & right
+
+    @property
+    def levels_only(self) -> bool:
+        return self.left.levels_only and self.right.levels_only
+
+class _Or(_And):
+    def __repr__(self) -> str:
+        return f"({self.left!r} | {self.right!r})"
+
+    def compile(self) -> Callable[[float, str, str], bool]:
+        left, right = self.left.compile(), self.right.compile()
+        return lambda epoch, level, message: left(epoch, level, message) or right(epoch, level, message)
+
+    def candidate_levels(self, all_levels: Iterable[str]) -> Optional[FrozenSet[str]]:
+        all_levels = list(all_levels)
+        left = self.left.candidate_levels(all_levels)
+        right = self.right.candidate_levels(all_levels)
+        if left is None or right is None:
+            return None
+        return left | right
+
+class _Not(Query):
+    def __init__(self, query: Query) -> None:
+        self.query = query
+        self.uses_time = query.uses_time
+
+    def __repr__(self) -> str:
+        return f"~{self.query!r}"
+
+    def compile(self) -> Callable[[float, str, str], bool]:
+        inner = self.query.compile()
+        return lambda epoch, level, message: not inner(epoch, level, message)
+
+    def candidate_levels(self, all_levels: Iterable[str]) -> Optional[FrozenSet[str]]:
+        if not self.query.levels_only:
+            return None
+        all_levels = frozenset(all_levels)
+        matching = self.query.candidate_levels(all_levels)
+        return all_levels - matching if matching is not None else None
+
+    @property
+    def levels_only(self) -> bool:
+        return self.query.levels_only
 
 class LogParser:
-    def __init__(self, log_file_path: str) -> None:
+    def __init__(self, log_file_path: Union[str, Sequence[str]], lazy: bool = False,
+                 cache_path: Optional[str] = None, skip_malformed: bool = False,
+                 instrumentation: Optional[Instrumentation] = None,
+                 log_format: Union[str, LogFormat, None] = None) -> None:
+        """
+        Parse one or more log files as a single sequence of entries.
+
+        Args:
+            log_file_path: Path to a log file, a glob, or a list of them. Files
+                ending in .gz, .bz2 or .xz are decompressed while streaming.
+            lazy: Memory-map the file and only index line offsets; each entry is
+                parsed when it is accessed instead of up front. Only supported
+                for a single uncompressed file.
+            cache_path: In lazy mode, reuse the line offsets saved in this sidecar
+                cache by analyze_file_cached, so only the unindexed tail is scanned
+            skip_malformed: Count and skip malformed lines instead of raising
+                ValueError (eager mode only)
+            instrumentation: Record read, parse and indexing times and the
+                malformed line count here
+            log_format: Layout of the lines: a LogFormat, the name of a
+                registered one (see log_formats), or 'auto' to detect it from
+                the first lines of the first file. Defaults to
+                "YYYY-MM-DD HH:MM:SS LEVEL message".
+        """
         self._log_file_path = log_file_path
-        self._log_entries = []
-        for line in self._file_reader_generator():
-            self._log_entries.append(LogEntry(line.strip()))
+        self._log_file_paths = expand_log_paths(log_file_path)
+        self.log_format = self._resolve_format(log_format)
+        self._instrumentation = instrumentation
+        self._epochs = None
+        self._time_order = None
+        self._sorted_epochs = None
+        self.malformed_count = 0
+        if lazy:
+            if len(self._log_file_paths) != 1 or _is_compressed(self._log_file_paths[0]):
+                raise ValueError("Lazy parsing needs exactly one uncompressed log file")
+            offsets, indexed_size = None, 0
+            if cache_path is not None and os.path.exists(self._log_file_paths[0]):
+                offsets, indexed_size = load_cached_line_offsets(self._log_file_paths[0], cache_path)
+            with _stage(instrumentation, 'index lines') as record:
+                self._store = _LineIndex(self._log_file_paths[0], offsets, indexed_size, self.log_format)
+                if record is not None:
+                    record.lines += len(self._store)
+                    record.bytes += os.path.getsize(self._log_file_paths[0]) - indexed_size
+            return
+
+        self._store = _ColumnStore()
+        if instrumentation is not None:
+            self._parse_instrumented(skip_malformed, instrumentation)
+        else:
+            self._parse_files(skip_malformed)
+
+    def _resolve_format(self, log_format: Union[str, LogFormat, None]) -> LogFormat:
+        if log_format is None:
+            return DEFAULT_FORMAT
+        if isinstance(log_format, LogFormat):
+            return log_format
+        if log_format != 'auto':
+            return get_format(log_format)
+
+        first_path = self._log_file_paths[0]
+        try:
+            with _open_log(first_path) as log_file:
+                return detect_format(line.decode(errors='replace') for line in log_file)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Log file provided does not exist: {first_path}")
+
+    def _parse_files(self, skip_malformed: bool, read_totals: Optional[List[float]] = None) -> None:
+        """Parse every file into the column store, timing reads into read_totals if given"""
+        for log_file_path in self._log_file_paths:
+            try:
+                with _open_log(log_file_path) as log_file:
+                    lines = log_file if read_totals is None else _timed_lines(log_file, read_totals)
+                    if self.log_format is DEFAULT_FORMAT:
+                        self.malformed_count += self._store.extend_raw(lines, skip_malformed)
+                    else:
+                        self.malformed_count += self._store.extend_parsed(lines, self.log_format.parse_bytes,
+                                                                          skip_malformed)
+            except FileNotFoundError:
+                raise FileNotFoundError(f"Log file provided does not exist: {log_file_path}")
+
+    def _parse_instrumented(self, skip_malformed: bool, instrumentation: Instrumentation) -> None:
+        """Eager parse that reports reading and parsing as separate stages"""
+        read_totals = [0.0, 0]
+        start = time.perf_counter()
+        self._parse_files(skip_malformed, read_totals)
+        elapsed = time.perf_counter() - start
+
+        read_seconds, read_bytes = read_totals
+        instrumentation.add_time('read', read_seconds, bytes=read_bytes)
+        instrumentation.add_time('parse', elapsed - read_seconds, len(self._store) + self.malformed_count, read_bytes)
+        instrumentation.count('malformed lines', self.malformed_count)
+
+    @classmethod
+    def from_snapshot(cls, snapshot_path: str, instrumentation: Optional[Instrumentation] = None) -> 'LogParser':
+        """
+        Open entries saved by save_snapshot without reading the original logs.
+
+        The snapshot is memory-mapped, so this only reads its header; columns
+        are paged in as they are used.
+        """
+        log_parser = cls.__new__(cls)
+        log_parser._log_file_path = snapshot_path
+        log_parser._log_file_paths = [snapshot_path]
+        log_parser.log_format = DEFAULT_FORMAT
+        log_parser._instrumentation = instrumentation
+        log_parser._epochs = None
+        log_parser._time_order = None
+        log_parser._sorted_epochs = None
+        log_parser.malformed_count = 0
+        try:
+            with _stage(instrumentation, 'load snapshot'):
+                log_parser._store = _SnapshotStore(snapshot_path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Snapshot provided does not exist: {snapshot_path}")
+        return log_parser
+
+    def save_snapshot(self, snapshot_path: str) -> None:
+        """
+        Save the parsed entries as a compact columnar snapshot (see snapshot.py).
+
+        Timestamps are stored as epoch seconds, keeping the original text only
+        for entries whose timestamp isn't in the canonical "YYYY-MM-DD HH:MM:SS"
+        form, and each distinct message is stored once.
+        """
+        store = self._store
+        if not isinstance(store, _ColumnStore):
+            store = _ColumnStore()
+            for entry in self:
+                store.append(entry.timestamp, entry.level, entry.message)
+        epochs = self.epochs
+
+        with _stage(self._instrumentation, 'save snapshot', len(store)):
+            # Ids are only collected from the first non-canonical timestamp on,
+            # so a snapshot of the default layout stores no timestamp column
+            timestamp_lookup = {}
+            timestamp_ids = None
+            last_timestamp, timestamp_id = None, 0
+            for index, timestamp in enumerate(store.timestamps):
+                if timestamp is not last_timestamp:
+                    last_timestamp = timestamp
+                    override = (len(timestamp) != 19 or timestamp[4] != '-' or timestamp[10] != ' '
+                                or math.isnan(epochs[index]))
+                    timestamp_id = timestamp_lookup.setdefault(timestamp, len(timestamp_lookup) + 1) if override else 0
+                    if override and timestamp_ids is None:
+                        timestamp_ids = array('I', [0]) * index
+                if timestamp_ids is not None:
+                    timestamp_ids.append(timestamp_id)
+
+            message_lookup = {}
+            message_ids = array('I', [message_lookup.setdefault(message, len(message_lookup))
+                                      for message in store.messages])
+            write_snapshot(snapshot_path, epochs, store.level_names, store.level_codes, store.level_postings,
+                           message_ids, list(message_lookup), timestamp_ids or array('I'), list(timestamp_lookup))
 
     def __repr__(self) -> str:
         return f"LogParser({self._log_file_path})"
     
     def __len__(self) -> int:
-        return len(self._log_entries)
+        return len(self._store)
+
+    def __iter__(self) -> Iterator[LogEntry]:
+        entry = self._store.entry
+        for i in range(len(self._store)):
+            yield entry(i)
     
     @overload
     def __getitem__(self, location: int) -> LogEntry:
         ...
     
     @overload
-    def __getitem__(self, location: slice) -> List[LogEntry]:
+    def __getitem__(self, location: slice) -> 'LogParserView':
         ...
 
-    def __getitem__(self, location: Union[int, slice]) -> Union[LogEntry, List[LogEntry]]:
+    def __getitem__(self, location: Union[int, slice]) -> Union[LogEntry, 'LogParserView']:
+        length = len(self._store)
         if isinstance(location, slice):
-            return [self._log_entries[i] for i in range(*location.indices(len(self._log_entries)))]
+            return LogParserView(self, range(length)[location])
 
         if not isinstance(location, int):
             raise ValueError(f"Invalid Index. Index must be an integer, not {type(location).__name__}")
 
-        if location < -len(self._log_entries) or location >= len(self._log_entries): 
-            raise IndexError(f"Index {location} is out of bounds for LogCollection of length {len(self._log_entries)}")
+        if location < -length or location >= length: 
+            raise IndexError(f"Index {location} is out of bounds for LogCollection of length {length}")
 
-        return self._log_entries[location]
-    
-    def _file_reader_generator(self) -> Iterator[str]:
+        return self._store.entry(location % length)
+
+    @property
+    def epochs(self) -> array:
+        """Timestamp of every entry as epoch seconds (NaN where it can't be parsed)"""
+        if self._epochs is None:
+            self._build_time_index()
+        return self._epochs
+
+    def between(self, start: Union[str, datetime, float], end: Union[str, datetime, float]) -> List[LogEntry]:
+        """
+        Return the entries with start <= timestamp < end, in time order.
+
+        Uses a sorted time index built on first use, so each query costs
+        O(log n + k) rather than a scan of every entry.
+        """
+        entry = self._store.entry
+        return [entry(index) for index in self._indices_between(start, end)]
+
+    def _indices_between(self, start: Union[str, datetime, float], end: Union[str, datetime, float]) -> Iterable[int]:
+        if self._sorted_epochs is None:
+            self._build_time_index()
+        lo = bisect_left(self._sorted_epochs, _to_epoch(start))
+        hi = bisect_left(self._sorted_epochs, _to_epoch(end), lo)
+        return map(self._time_order.__getitem__, range(lo, hi))
+
+    def query(self, query: Query) -> Iterator[LogEntry]:
+        """
+        Yield the entries matching query, in file order.
+
+        When the query restricts the level, only the posting lists of those
+        levels are visited; a pure level query evaluates no predicate at all.
+        """
+        return self._query(query, range(len(self._store)))
+
+    def _query(self, query: Query, indices: range) -> Iterator[LogEntry]:
+        """Yield the entries at indices matching query, in the order of indices"""
+        store = self._store
+        if not indices:
+            return
+        columnar = isinstance(store, (_ColumnStore, _SnapshotStore))
+        levels = None
+        if columnar and indices.step > 0:
+            levels = query.candidate_levels(store.level_names)
+        if levels is not None:
+            candidates = store.indices_with_levels(levels, indices[0], indices[-1] + 1)
+            if indices.step != 1:
+                candidates = filter(indices.__contains__, candidates)
+            if query.levels_only:
+                for index in candidates:
+                    yield store.entry(index)
+                return
+        else:
+            candidates = indices
+
+        predicate = query.compile()
+        epochs = self.epochs if query.uses_time else None
+        if not columnar:
+            for index in candidates:
+                entry = store.entry(index)
+                if predicate(epochs[index] if epochs is not None else math.nan, entry.level, entry.message):
+                    yield entry
+            return
+
+        level_names, level_codes, messages = store.level_names, store.level_codes, store.messages
+        for index in candidates:
+            epoch = epochs[index] if epochs is not None else math.nan
+            if predicate(epoch, level_names[level_codes[index]], messages[index]):
+                yield store.entry(index)
+
+    def _column_counts(self, indices: Optional[range] = None) -> Optional[Tuple[Dict[str, int], Dict[str, int]]]:
+        """Level and message counts (of the entries at indices) computed from the columns, or None for a lazy parser"""
+        store = self._store
+        if not isinstance(store, (_ColumnStore, _SnapshotStore)):
+            return None
+        if indices is None:
+            if isinstance(store, _ColumnStore):
+                level_counts = {level: len(posting) for level, posting in zip(store.level_names, store.level_postings)}
+                return level_counts, Counter(store.messages)
+            level_counts = {level: len(store.snapshot.posting(code)) for code, level in enumerate(store.level_names)}
+            message_ids = Counter(store.snapshot.message_ids)
+        else:
+            level_counts = {store.level_names[code]: count
+                            for code, count in Counter(map(store.level_codes.__getitem__, indices)).items()}
+            if isinstance(store, _ColumnStore):
+                return level_counts, Counter(map(store.messages.__getitem__, indices))
+            message_ids = Counter(map(store.snapshot.message_ids.__getitem__, indices))
+        message = store.snapshot.message
+        return level_counts, {message(message_id): count for message_id, count in message_ids.items()}
+
+    def _build_time_index(self) -> None:
+        with _stage(self._instrumentation, 'time index', len(self._store)):
+            if isinstance(self._store, _SnapshotStore):
+                epochs = self._store.epochs
+            else:
+                epochs = array('d')
+                seen = {}
+                for timestamp in self._store.iter_timestamps():
+                    epoch = seen.get(timestamp)
+                    if epoch is None:
+                        epoch = seen[timestamp] = _timestamp_to_epoch(timestamp)
+                    epochs.append(epoch)
+
+            order = sorted((i for i, epoch in enumerate(epochs) if not math.isnan(epoch)), key=epochs.__getitem__)
+            self._epochs = epochs
+            self._time_order = array('Q', order)
+            self._sorted_epochs = array('d', (epochs[i] for i in order))
+
+    def close(self) -> None:
+        """Release the memory map held by a lazy or snapshot parser"""
+        if isinstance(self._store, (_LineIndex, _SnapshotStore)):
+            self._store.close()
+
+class _EpochsView:
+    """Epochs of the entries in a LogParserView"""
+    def __init__(self, epochs: Sequence[float], indices: range) -> None:
+        self._epochs = epochs
+        self._indices = indices
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    def __getitem__(self, index: int) -> float:
+        return self._epochs[self._indices[index]]
+
+    def __iter__(self) -> Iterator[float]:
+        return map(self._epochs.__getitem__, self._indices)
+
+class LogParserView:
+    """
+    A slice of a LogParser that refers to the parser's entries instead of copying them.
+
+    Holds only the parser and a range of indices, so slicing any number of
+    entries costs O(1); entries are built as they are read. Views can be
+    indexed, iterated, sliced again, queried and passed to LogAnalyzer.
+    """
+    def __init__(self, log_parser: LogParser, indices: range) -> None:
+        self._log_parser = log_parser
+        self._indices = indices
+
+    def __repr__(self) -> str:
+        return f"LogParserView({self._log_parser}, {self._indices})"
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    def __iter__(self) -> Iterator[LogEntry]:
+        return map(self._log_parser._store.entry, self._indices)
+
+    def __eq__(self, other):
+        if isinstance(other, (list, tuple, LogParserView)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    @overload
+    def __getitem__(self, location: int) -> LogEntry:
+        ...
+
+    @overload
+    def __getitem__(self, location: slice) -> 'LogParserView':
+        ...
+
+    def __getitem__(self, location: Union[int, slice]) -> Union[LogEntry, 'LogParserView']:
+        if isinstance(location, slice):
+            return LogParserView(self._log_parser, self._indices[location])
+
+        if not isinstance(location, int):
+            raise ValueError(f"Invalid Index. Index must be an integer, not {type(location).__name__}")
+
+        length = len(self._indices)
+        if location < -length or location >= length:
+            raise IndexError(f"Index {location} is out of bounds for LogCollection of length {length}")
+
+        return self._log_parser._store.entry(self._indices[location])
+
+    @property
+    def epochs(self) -> _EpochsView:
+        """Timestamp of every entry in the view as epoch seconds"""
+        return _EpochsView(self._log_parser.epochs, self._indices)
+
+    def between(self, start: Union[str, datetime, float], end: Union[str, datetime, float]) -> List[LogEntry]:
+        """Return the entries of the view with start <= timestamp < end, in time order"""
+        entry = self._log_parser._store.entry
+        return [entry(index) for index in self._log_parser._indices_between(start, end) if index in self._indices]
+
+    def query(self, query: Query) -> Iterator[LogEntry]:
+        """Yield the entries of the view matching query, in view order"""
+        return self._log_parser._query(query, self._indices)
+
+    def _column_counts(self) -> Optional[Tuple[Dict[str, int], Dict[str, int]]]:
+        return self._log_parser._column_counts(self._indices)
+
+class LogStats:
+    """Aggregated counts for a stream of log entries, built in a single pass"""
+    def __init__(self, message_capacity: Optional[int] = None, group_templates: bool = False) -> None:
+        """
+        Args:
+            message_capacity: Track at most this many distinct messages with a
+                SpaceSaving sketch instead of counting every message exactly.
+                Message counts then become estimates with a reported error bound.
+            group_templates: Count each message under its template (see
+                TemplateMiner), so messages differing only in numbers or ids
+                share one counter
+        """
+        self.group_templates = group_templates
+        self.total = 0
+        self.malformed_count = 0
+        self.level_counts = defaultdict(int)
+        self.message_counts = defaultdict(int) if message_capacity is None else None
+        self.message_sketch = SpaceSaving(message_capacity) if message_capacity is not None else None
+
+    def __repr__(self) -> str:
+        return f"LogStats(total={self.total}, levels={dict(self.level_counts)})"
+
+    @property
+    def is_approximate(self) -> bool:
+        return self.message_sketch is not None
+
+    @property
+    def message_error_bound(self) -> int:
+        """Upper bound on how much any message count may be overestimated"""
+        return self.message_sketch.error_bound if self.is_approximate else 0
+
+    def add(self, level: str, message: str) -> None:
+        """Count a single entry"""
+        if self.group_templates:
+            message = _template_miner.template(message)
+        self.total += 1
+        self.level_counts[level] += 1
+        if self.message_sketch is None:
+            self.message_counts[message] += 1
+        else:
+            self.message_sketch.add(message)
+
+    def update(self, entries: Iterable[LogEntry]) -> 'LogStats':
+        """Count every entry in entries"""
+        if isinstance(entries, (LogParser, LogParserView)) and self.message_sketch is None:
+            # Exact counts of a parsed file come straight from its columns
+            counts = entries._column_counts()
+            if counts is not None:
+                return self._add_counts(*counts)
+
+        if self.message_sketch is not None or self.group_templates:
+            for entry in entries:
+                self.add(entry.level, entry.message)
+            return self
+
+        level_counts = self.level_counts
+        message_counts = self.message_counts
+        total = 0
+        for entry in entries:
+            level_counts[entry.level] += 1
+            message_counts[entry.message] += 1
+            total += 1
+        self.total += total
+        return self
+
+    def _add_counts(self, level_counts: Dict[str, int], message_counts: Dict[str, int]) -> 'LogStats':
+        """Add precomputed exact counts"""
+        self.total += sum(level_counts.values())
+        for level, count in level_counts.items():
+            self.level_counts[level] += count
+        template = _template_miner.template if self.group_templates else None
+        for message, count in message_counts.items():
+            self.message_counts[template(message) if template else message] += count
+        return self
+
+    def merge(self, other: 'LogStats') -> 'LogStats':
+        """Fold the counts of another LogStats into this one"""
+        if self.is_approximate != other.is_approximate:
+            raise ValueError("Can't merge exact and approximate LogStats")
+        if self.group_templates != other.group_templates:
+            raise ValueError("Can't merge LogStats counting templates with LogStats counting raw messages")
+        self.total += other.total
+        self.malformed_count += other.malformed_count
+        for level, count in other.level_counts.items():
+            self.level_counts[level] += count
+        if self.message_sketch is not None:
+            self.message_sketch.merge(other.message_sketch)
+        else:
+            for message, count in other.message_counts.items():
+                self.message_counts[message] += count
+        return self
+
+    def top_messages(self, n: int) -> List[Tuple[str, int]]:
+        """Returns the n most frequent messages with their counts, highest first"""
+        if self.message_sketch is not None:
+            return [(message, count) for message, count, _ in self.message_sketch.top(n)]
+        return heapq.nlargest(n, self.message_counts.items(), key=itemgetter(1))
+
+    def to_dict(self) -> dict:
+        """JSON-serialisable snapshot of the counts"""
+        return {
+            'total': self.total,
+            'malformed_count': self.malformed_count,
+            'group_templates': self.group_templates,
+            'level_counts': self.level_counts,
+            'message_counts': self.message_counts,
+            'message_sketch': self.message_sketch.to_dict() if self.message_sketch is not None else None,
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> 'LogStats':
+        stats = cls(group_templates=state['group_templates'])
+        stats.total = state['total']
+        stats.malformed_count = state['malformed_count']
+        stats.level_counts.update(state['level_counts'])
+        if state['message_sketch'] is not None:
+            stats.message_counts = None
+            stats.message_sketch = SpaceSaving.from_dict(state['message_sketch'])
+        else:
+            stats.message_counts.update(state['message_counts'])
+        return stats
+
+    def copy(self) -> 'LogStats':
+        return LogStats.from_dict(self.to_dict())
+
+    def template_counts(self) -> Dict[str, int]:
+        """Message counts rolled up by template"""
+        if self.group_templates and self.message_sketch is not None:
+            return dict(self.top_messages(len(self.message_sketch)))
+        if self.group_templates:
+            return dict(self.message_counts)
+        if self.message_sketch is not None:
+            raise ValueError("Template counts need exact message counts or group_templates=True")
+
+        counts = defaultdict(int)
+        template = _template_miner.template
+        for message, count in self.message_counts.items():
+            counts[template(message)] += count
+        return dict(counts)
+
+def _split_byte_ranges(log_file_path: str, chunks: int) -> List[Tuple[int, int]]:
+    """Split a file into at most `chunks` byte ranges that start and end on line boundaries"""
+    size = os.path.getsize(log_file_path)
+    boundaries = [0]
+    with open(log_file_path, 'rb') as log_file:
+        for i in range(1, chunks):
+            log_file.seek(max(size * i // chunks, boundaries[-1]))
+            log_file.readline()
+            position = min(log_file.tell(), size)
+            if position > boundaries[-1]:
+                boundaries.append(position)
+    if boundaries[-1] < size:
+        boundaries.append(size)
+    return list(zip(boundaries, boundaries[1:]))
+
+def _add_lines(stats: LogStats, lines: Iterable[bytes], parse_line: Callable[[bytes], Tuple[str, str, str]],
+               skip_malformed: bool = False) -> None:
+    """Parse lines into stats, counting malformed ones in stats.malformed_count if skip_malformed is set"""
+    add = stats.add
+    for line in lines:
         try:
-            with open(self._log_file_path, 'r') as log_file:
-                for line in log_file:
-                    yield line
-        except FileNotFoundError:
-            raise FileNotFoundError(f"Log file provided does not exist: {self._log_file_path}")
+            _, level, message = parse_line(line)
+        except ValueError:
+            if not skip_malformed:
+                raise
+            stats.malformed_count += 1
+            continue
+        add(level, message)
+
+def _lines_in_range(log_file: BinaryIO, length: int) -> Iterator[bytes]:
+    """The lines of a binary file from its current position that start within the next `length` bytes"""
+    for line in log_file:
+        if length <= 0:
+            break
+        length -= len(line)
+        yield line
+
+def _analyze_byte_range(log_file_path: str, start: int, end: Optional[int], message_capacity: Optional[int] = None,
+                        group_templates: bool = False, skip_malformed: bool = False) -> LogStats:
+    """Parse and aggregate the lines in [start, end) of a log file, or all of it if end is None"""
+    stats = LogStats(message_capacity, group_templates)
+    parse_line = DEFAULT_FORMAT.parse_bytes
+    if end is None:
+        with _open_log(log_file_path) as log_file:
+            _add_lines(stats, log_file, parse_line, skip_malformed)
+        return stats
+
+    with open(log_file_path, 'rb') as log_file:
+        log_file.seek(start)
+        _add_lines(stats, _lines_in_range(log_file, end - start), parse_line, skip_malformed)
+    return stats
+
+def analyze_file_parallel(log_file_path: Union[str, Sequence[str]], workers: int,
+                          message_capacity: Optional[int] = None, group_templates: bool = False,
+                          skip_malformed: bool = False) -> LogStats:
+    """
+    Parse and aggregate log files across a pool of worker processes.
+
+    Each plain file is split into newline-aligned byte ranges, while compressed
+    files can't be seeked into and are handled whole by one worker. Workers
+    return the LogStats for their tasks and the partial results are merged in
+    file order, so the counts match a single-process run. With workers <= 1
+    the files are streamed through this process without starting a pool.
+    With skip_malformed, malformed lines are counted in the result's
+    malformed_count instead of raising.
+    """
+    tasks = []
+    for path in expand_log_paths(log_file_path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Log file provided does not exist: {path}")
+        if workers <= 1 or _is_compressed(path):
+            tasks.append((path, 0, None, message_capacity, group_templates, skip_malformed))
+        else:
+            tasks.extend((path, start, end, message_capacity, group_templates, skip_malformed)
+                         for start, end in _split_byte_ranges(path, workers * 4))
+
+    stats = LogStats(message_capacity, group_templates)
+    if workers <= 1:
+        for task in tasks:
+            stats.merge(_analyze_byte_range(*task))
+        return stats
+    if not tasks:
+        return stats
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for partial in executor.map(_analyze_byte_range, *zip(*tasks)):
+            stats.merge(partial)
+    return stats
+
+def analyze_file_cached(log_file_path: str, cache_path: Optional[str] = None, message_capacity: Optional[int] = None,
+                        group_templates: bool = False, skip_malformed: bool = False) -> LogStats:
+    """
+    Aggregate a log file, resuming from a sidecar cache of a previous run.
+
+    The cache (by default `<log file>.lacache`) holds the counts, the line-offset
+    index and the byte offset analyzed so far, keyed on the file's inode, size,
+    mtime and a hash of its first bytes. If the file only grew since then, just
+    the appended tail is parsed; if it was rotated, truncated or rewritten, or
+    the counting options differ, it is analyzed from scratch. A trailing line
+    without a newline is counted in the result but not cached, so it is not
+    counted twice once the rest of it arrives. With skip_malformed, malformed
+    lines are counted in the result's malformed_count instead of raising.
+    """
+    if _is_compressed(log_file_path):
+        raise ValueError("Cached analysis needs an uncompressed log file")
+    if not os.path.exists(log_file_path):
+        raise FileNotFoundError(f"Log file provided does not exist: {log_file_path}")
+
+    cache_path = cache_path or default_cache_path(log_file_path)
+    fingerprint = file_fingerprint(log_file_path)
+    options = {'message_capacity': message_capacity, 'group_templates': group_templates,
+               'skip_malformed': skip_malformed}
+
+    cached = load_cache(cache_path)
+    if (cached is not None and cached[0]['options'] == options
+            and is_same_file(cached[0]['fingerprint'], fingerprint, log_file_path)):
+        header, offsets = cached
+        stats = LogStats.from_dict(header['stats'])
+        position = header['offset']
+        if header['fingerprint'] == fingerprint:
+            if position < fingerprint['size']:
+                _add_partial_line(stats, log_file_path, position, skip_malformed)
+            return stats
+    else:
+        stats = LogStats(message_capacity, group_templates)
+        offsets = array('Q')
+        position = 0
+
+    partial = None
+    add = stats.add
+    parse_line = DEFAULT_FORMAT.parse_bytes
+    with open(log_file_path, 'rb') as log_file:
+        log_file.seek(position)
+        for line in log_file:
+            if not line.endswith(b'\n'):
+                partial = line
+                break
+            offsets.append(position)
+            position += len(line)
+            try:
+                _, level, message = parse_line(line)
+            except ValueError:
+                if not skip_malformed:
+                    raise
+                stats.malformed_count += 1
+                continue
+            add(level, message)
+
+    save_cache(cache_path, {'fingerprint': fingerprint, 'options': options, 'offset': position,
+                            'stats': stats.to_dict()}, offsets)
+    if partial is not None:
+        stats = stats.copy()
+        _add_lines(stats, [partial], parse_line, skip_malformed)
+    return stats
+
+def _add_partial_line(stats: LogStats, log_file_path: str, position: int, skip_malformed: bool = False) -> None:
+    """Count the unterminated last line that a cached analysis left out"""
+    with open(log_file_path, 'rb') as log_file:
+        log_file.seek(position)
+        _add_lines(stats, [log_file.read()], DEFAULT_FORMAT.parse_bytes, skip_malformed)
+
+def load_cached_line_offsets(log_file_path: str, cache_path: Optional[str] = None) -> Tuple[Optional[array], int]:
+    """Line offsets from a still-valid sidecar cache and the number of bytes they cover"""
+    cached = load_cache(cache_path or default_cache_path(log_file_path))
+    if cached is None or not is_same_file(cached[0]['fingerprint'], file_fingerprint(log_file_path), log_file_path):
+        return None, 0
+    header, offsets = cached
+    return offsets, header['offset']
 
 class LogAnalyzer:
-    def __init__(self, log_parser: LogParser):
+    def __init__(self, log_parser: Optional[LogParser] = None, stats: Optional[LogStats] = None,
+                 message_capacity: Optional[int] = None, group_templates: bool = False,
+                 instrumentation: Optional[Instrumentation] = None):
+        """
+        Analyze parsed log entries.
+
+        Args:
+            log_parser: Parsed entries to aggregate
+            stats: Precomputed counts, e.g. from analyze_file_parallel. Without a
+                log_parser only the aggregate properties are available.
+            message_capacity: Approximate message counts with a sketch tracking at
+                most this many messages (see LogStats)
+            group_templates: Count messages by template, so top_messages reports
+                templates such as "Slow query detected <NUM>ms"
+            instrumentation: Record the aggregation pass as a stage here
+        """
+        if log_parser is None and stats is None:
+            raise ValueError("LogAnalyzer needs a log_parser or precomputed stats")
         self._log_parser = log_parser
+        self._stats = stats
+        self._message_capacity = message_capacity
+        self._group_templates = group_templates
+        self._instrumentation = instrumentation
 
     def __repr__(self):
-        return f"LogAnalyzer({self._log_parser})"
+        return f"LogAnalyzer({self._log_parser if self._log_parser is not None else self._stats})"
+
+    @property
+    def stats(self) -> LogStats:
+        """Aggregated counts, computed with one pass over the parser on first use"""
+        if self._stats is None:
+            with _stage(self._instrumentation, 'aggregate', len(self._log_parser)):
+                self._stats = LogStats(self._message_capacity, self._group_templates).update(self._log_parser)
+        return self._stats
     
     @property
     def log_count(self):
         """Count of all log entries"""
+        if self._log_parser is None:
+            return self._stats.total
         return len(self._log_parser)
     
     @property
     def error_count(self):
         """Count of all ERROR log entries"""
-        return self.log_levels.get('ERROR', 0)
+        return self.stats.level_counts.get('ERROR', 0)
 
     @property
     def warning_count(self):
         """Count of all WARNING log entries"""
-        return self.log_levels.get('WARNING', 0)
+        return self.stats.level_counts.get('WARNING', 0)
     
     @property
     def log_levels(self):
-        log_level_dict = defaultdict(int)
-        for log_entry in self._log_parser:
-            log_level_dict[log_entry.level] += 1
-        return log_level_dict
+        return dict(self.stats.level_counts)
     
     @property
     def most_common_log_message(self):
-        log_messages = defaultdict(int)
-        for log_entry in self._log_parser:
-            log_messages[log_entry.message] += 1
-        max_message = max(log_messages, key = lambda msg: log_messages[msg])
-        return f"Most common log message: '{max_message}' with {log_messages[max_message]} occurrences."
+        top = self.stats.top_messages(1)
+        if not top:
+            raise ValueError("No log messages to rank")
+        max_message, count = top[0]
+        return f"Most common log message: '{max_message}' with {count} occurrences."
     
     def top_messages(self, n: int = 5):
         """Returns the top n log messages"""
-        log_messages = defaultdict(int)
-        for log_entry in self._log_parser:
-            log_messages[log_entry.message] += 1
+        return self.stats.top_messages(n)
+
+    def top_templates(self, n: int = 5):
+        """Returns the top n message templates, e.g. ('Slow query detected <NUM>ms', 12)"""
+        return heapq.nlargest(n, self.stats.template_counts().items(), key=itemgetter(1))
 
-        sorted_messages = sorted(log_messages.items(), key=lambda x: x[1], reverse=True)
-        return sorted_messages[:n]
+    @property
+    def message_error_bound(self):
+        """Maximum overestimate of any message count (0 unless counts are approximate)"""
+        return self.stats.message_error_bound
     
+    def time_slice(self, start: Union[str, datetime, float], end: Union[str, datetime, float]) -> 'LogAnalyzer':
+        """Returns an analyzer over the entries with start <= timestamp < end"""
+        if self._log_parser is None:
+            raise ValueError("time_slice needs the parsed entries, not just precomputed stats")
+        if isinstance(self._log_parser, (LogParser, LogParserView)):
+            return LogAnalyzer(self._log_parser.between(start, end))
+
+        start_epoch, end_epoch = _to_epoch(start), _to_epoch(end)
+        return LogAnalyzer([entry for entry in self._log_parser
+                            if start_epoch <= _timestamp_to_epoch(entry.timestamp) < end_epoch])
+
+    def level_histogram(self, bucket: Union[str, int] = 'minute') -> Dict[str, Dict[str, int]]:
+        """
+        Count log levels per time bucket.
+
+        Args:
+            bucket: 'minute', 'hour', 'day' or a bucket width in seconds
+
+        Returns:
+            Dict mapping each bucket's start timestamp to its level counts, in time order
+        """
+        if self._log_parser is None:
+            raise ValueError("level_histogram needs the parsed entries, not just precomputed stats")
+        width = _BUCKET_SECONDS.get(bucket, bucket)
+        if not isinstance(width, int) or width <= 0:
+            raise ValueError(f"Invalid bucket: {bucket}")
+
+        if isinstance(self._log_parser, (LogParser, LogParserView)):
+            timed_entries = zip(self._log_parser.epochs, self._log_parser)
+        else:
+            timed_entries = ((_timestamp_to_epoch(entry.timestamp), entry) for entry in self._log_parser)
+
+        buckets = defaultdict(lambda: defaultdict(int))
+        for epoch, entry in timed_entries:
+            if not math.isnan(epoch):
+                buckets[epoch // width * width][entry.level] += 1
+        return {_epoch_to_timestamp(start): dict(buckets[start]) for start in sorted(buckets)}
+
     def filter_by_level(self, level: str):
         """Returns all log entries with a speceified level"""
-        return [entry for entry in self._log_parser if entry.level == level]
+        return list(self.query(LevelIn(level)))
+
+    def query(self, query: Query) -> Iterator[LogEntry]:
+        """Yield the entries matching query (see Query), in order"""
+        if self._log_parser is None:
+            raise ValueError("Queries need the parsed entries, not just precomputed stats")
+        if isinstance(self._log_parser, (LogParser, LogParserView)):
+            return self._log_parser.query(query)
+
+        predicate = query.compile()
+        return (entry for entry in self._log_parser
+                if predicate(_timestamp_to_epoch(entry.timestamp) if query.uses_time else math.nan,
+                             entry.level, entry.message))
+
+class LogFollower:
+    """
+    Follow a growing log file the way `tail -f` does.
+
+    Each poll parses only the bytes appended since the previous one and folds
+    them into `stats`, reading at most `chunk_size` bytes at a time so a large
+    backlog is never held in memory at once. A partial last line is held back
+    until its newline arrives. If the file shrinks (truncated) or the path now names another
+    file (rotated, e.g. moved to app.log.1 and recreated), counting restarts
+    from the beginning of the file at the path; while a rotation has left no
+    file there, polls return 0.
+    """
+    def __init__(self, log_file_path: str, message_capacity: Optional[int] = None,
+                 group_templates: bool = False, chunk_size: int = 1 << 20) -> None:
+        if not os.path.exists(log_file_path):
+            raise FileNotFoundError(f"Log file provided does not exist: {log_file_path}")
+        self._log_file_path = log_file_path
+        self.chunk_size = chunk_size
+        self._message_capacity = message_capacity
+        self._group_templates = group_templates
+        self._offset = 0
+        self._pending = b''
+        self._identity: Optional[Tuple[int, int]] = None
+        self._parse_line = DEFAULT_FORMAT.parse_bytes
+        self.stats = LogStats(message_capacity, group_templates)
+        self.malformed_count = 0
+
+    def __repr__(self) -> str:
+        return f"LogFollower({self._log_file_path}, offset={self._offset})"
+
+    def poll(self) -> int:
+        """Parse newly appended lines and return how many entries were added"""
+        try:
+            stat = os.stat(self._log_file_path)
+        except FileNotFoundError:
+            return 0
+        size = stat.st_size
+        identity = (stat.st_dev, stat.st_ino)
+        if size < self._offset or (self._identity is not None and identity != self._identity):
+            self._offset = 0
+            self._pending = b''
+            self.stats = LogStats(self._message_capacity, self._group_templates)
+            self.malformed_count = 0
+        self._identity = identity
+        if size == self._offset:
+            return 0
+
+        added = 0
+        add = self.stats.add
+        with open(self._log_file_path, 'rb') as log_file:
+            log_file.seek(self._offset)
+            while self._offset < size:
+                chunk = log_file.read(min(self.chunk_size, size - self._offset))
+                if not chunk:
+                    break
+                self._offset += len(chunk)
+                lines = (self._pending + chunk).split(b'\n')
+                self._pending = lines.pop()
+                for line in lines:
+                    try:
+                        _, level, message = self._parse_line(line)
+                    except ValueError:
+                        self.malformed_count += 1
+                        continue
+                    add(level, message)
+                    added += 1
+        return added
+
+    def follow(self, interval: float = 5.0, poll_interval: float = 0.5,
+               on_refresh: Optional[Callable[[LogStats], None]] = None) -> None:
+        """Poll forever, calling on_refresh with the current stats every `interval` seconds"""
+        next_refresh = time.monotonic()
+        while True:
+            self.poll()
+            if on_refresh is not None and time.monotonic() >= next_refresh:
+                on_refresh(self.stats)
+                next_refresh = time.monotonic() + interval
+            time.sleep(poll_interval)
+
+def _timed_entries(source: Iterable[LogEntry]) -> Iterator[Tuple[float, LogEntry]]:
+    """(epoch, entry) pairs of a source; an unparseable timestamp takes the previous entry's epoch"""
+    if isinstance(source, (LogParser, LogParserView)):
+        pairs = zip(source.epochs, source)
+    else:
+        pairs = ((_timestamp_to_epoch(entry.timestamp), entry) for entry in source)
+    last_epoch = -math.inf
+    for epoch, entry in pairs:
+        if math.isnan(epoch):
+            epoch = last_epoch
+        last_epoch = epoch
+        yield epoch, entry
+
+def merge_by_time(*sources: Iterable[LogEntry]) -> Iterator[LogEntry]:
+    """
+    Merge sources that are each in timestamp order into one stream in timestamp order.
+
+    A heap holds one pending entry per source, so only O(k) entries are held
+    on top of the sources themselves, and the stream can be consumed lazily.
+    Entries with equal timestamps keep the order of their sources. Use
+    list(...) to materialise the merged timeline, e.g. for LogAnalyzer.
+
+    Args:
+        sources: LogParsers, views, query results or any iterables of LogEntry
+    """
+    return map(itemgetter(1), heapq.merge(*map(_timed_entries, sources), key=itemgetter(0)))
+
+def print_summary(log_analyzer: LogAnalyzer, top: int = 5, level: Optional[str] = None) -> None:
+    """Print the CLI summary for an analyzer"""
+    print(f"Total logs: {log_analyzer.log_count}")
+    print(f"Log levels: {dict(log_analyzer.log_levels)}")
+    print(f"\nTop {top} log messages:")
+    for msg, cnt in log_analyzer.top_messages(top):
+        print(f"  {cnt:3d}x - {msg}")
+    if log_analyzer.stats.is_approximate:
+        print(f"  (approximate: counts may be overestimated by up to {log_analyzer.message_error_bound})")
+
+    if level:
+        print(f"\n{level} log entries: {log_analyzer.log_levels.get(level, 0)}")
+
+def build_query(levels: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None,
+                contains: Optional[str] = None, regex: Optional[str] = None, invert: bool = False) -> Optional[Query]:
+    """Combine the CLI filter options into one Query, or None if none were given"""
+    parts = []
+    if levels:
+        parts.append(LevelIn(*levels.split(',')))
+    if since or until:
+        parts.append(TimeRange(since, until))
+    if contains:
+        parts.append(Contains(contains))
+    if regex:
+        parts.append(Matches(regex))
+    if not parts:
+        return None
+
+    query = parts[0]
+    for part in parts[1:]:
+        query = query & part
+    return ~query if invert else query
+
+def open_log_parser(log_file_paths: Sequence[str], skip_malformed: bool = False,
+                    instrumentation: Optional[Instrumentation] = None,
+                    log_format: Union[str, LogFormat, None] = None) -> LogParser:
+    """Parse log files, or open a single snapshot saved by LogParser.save_snapshot"""
+    if len(log_file_paths) == 1 and log_file_paths[0].endswith(SNAPSHOT_SUFFIX):
+        return LogParser.from_snapshot(log_file_paths[0], instrumentation)
+    return LogParser(log_file_paths, skip_malformed=skip_malformed, instrumentation=instrumentation,
+                     log_format=log_format)
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Analyze log files.')
-    parser.add_argument('filename', help='Path to log file')
+    parser.add_argument('filenames', nargs='+', help='Paths or globs of log files, optionally .gz/.bz2/.xz compressed')
     parser.add_argument('--level', help='Filter log entries by level', default=None)
+    parser.add_argument('--format', choices=[*available_formats(), 'auto'], default=None,
+                        help="Layout of the log lines, or 'auto' to detect it (default: YYYY-MM-DD HH:MM:SS LEVEL message)")
     parser.add_argument('--top', type=int, help='Return top n log messages', default=5)
+    parser.add_argument('--workers', type=int, help='Parse the file across N worker processes', default=1)
+    parser.add_argument('--follow', action='store_true', help='Keep reading lines appended to the file, like tail -f')
+    parser.add_argument('--interval', type=float, help='Seconds between summaries in --follow mode', default=5.0)
+    parser.add_argument('--approx-top', type=int, metavar='CAPACITY', default=None,
+                        help='Approximate message counts, tracking at most CAPACITY distinct messages')
+    parser.add_argument('--cache', action='store_true',
+                        help='Keep counts in a sidecar cache and only parse what was appended since the last run')
+    parser.add_argument('--templates', action='store_true',
+                        help='Group messages into templates, masking numbers, hex ids, UUIDs and IPs')
+    parser.add_argument('--levels', help='Print entries whose level is in this comma-separated list')
+    parser.add_argument('--since', help='Print entries at or after this timestamp')
+    parser.add_argument('--until', help='Print entries before this timestamp')
+    parser.add_argument('--contains', help='Print entries whose message contains this text')
+    parser.add_argument('--regex', help='Print entries whose message matches this regular expression')
+    parser.add_argument('--invert', action='store_true', help='Print the entries that do not match the filters')
+    parser.add_argument('--merge', action='store_true',
+                        help='Print the entries of all files interleaved by timestamp (after any filters)')
+    parser.add_argument('--save-snapshot', metavar='PATH',
+                        help=f'Save the parsed entries as a binary snapshot; pass a {SNAPSHOT_SUFFIX} file instead of logs to reload it')
+    parser.add_argument('--skip-malformed', action='store_true', help='Skip and count malformed lines instead of failing')
+    parser.add_argument('--stats', action='store_true',
+                        help='Print per-stage timings, throughput, malformed lines and peak memory to stderr')
+    parser.add_argument('--profile', metavar='PATH',
+                        help='Run under cProfile, save the profile to PATH and print the slowest functions to stderr')
 
     args = parser.parse_args()
 
-    log_parser = LogParser(args.filename)
-    log_analyzer = LogAnalyzer(log_parser)
+    if args.follow and len(args.filenames) != 1:
+        parser.error('--follow takes exactly one log file')
+    if args.format is not None and (args.follow or args.cache or args.workers > 1):
+        parser.error('--format can not be combined with --follow, --cache or --workers')
+    from_snapshot = len(args.filenames) == 1 and args.filenames[0].endswith(SNAPSHOT_SUFFIX)
+    if args.save_snapshot and (args.follow or args.cache or args.workers > 1 or args.approx_top is not None):
+        parser.error('--save-snapshot can not be combined with --follow, --cache, --workers or --approx-top')
 
-    print(f"Total logs: {log_analyzer.log_count}")
-    print(f"Log levels: {dict(log_analyzer.log_levels)}")
-    print(f"\nTop {args.top} log messages:")
-    for msg, cnt in log_analyzer.top_messages(args.top):
-        print(f"  {cnt:3d}x - {msg}")
+    try:
+        query = build_query(args.levels, args.since, args.until, args.contains, args.regex, args.invert)
+    except (ValueError, re.error) as e:
+        parser.error(str(e))
+    if (query is not None or args.merge) and args.follow:
+        parser.error('Filters and --merge can not be combined with --follow')
+
+    instrumentation = Instrumentation() if args.stats or args.profile else None
+    profiler = None
+    if args.profile:
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    if args.follow:
+        def refresh(stats: LogStats) -> None:
+            print(f"\n--- {time.strftime('%Y-%m-%d %H:%M:%S')} ---")
+            print_summary(LogAnalyzer(stats=stats), args.top, args.level)
+
+        try:
+            LogFollower(args.filenames[0], args.approx_top, args.templates).follow(args.interval, on_refresh=refresh)
+        except KeyboardInterrupt:
+            pass
+    elif args.merge:
+        log_parsers = [LogParser(log_path, skip_malformed=args.skip_malformed, instrumentation=instrumentation,
+                                 log_format=args.format)
+                       for log_path in expand_log_paths(args.filenames)]
+        with _stage(instrumentation, 'merge'):
+            sources = [log_parser.query(query) for log_parser in log_parsers] if query is not None else log_parsers
+            for entry in merge_by_time(*sources):
+                print(f"{entry.timestamp} {entry.level} {entry.message}")
+    elif query is not None:
+        log_parser = open_log_parser(args.filenames, args.skip_malformed, instrumentation, args.format)
+        if args.save_snapshot:
+            log_parser.save_snapshot(args.save_snapshot)
+        if query.uses_time:
+            log_parser.epochs  # build the time index as its own stage
+        with _stage(instrumentation, 'query') as record:
+            for entry in LogAnalyzer(log_parser, instrumentation=instrumentation).query(query):
+                print(f"{entry.timestamp} {entry.level} {entry.message}")
+            if record is not None:
+                record.lines += len(log_parser)
+    else:
+        if not from_snapshot and args.format is None and (args.cache or args.workers > 1 or args.approx_top is not None):
+            log_paths = expand_log_paths(args.filenames)
+            if args.cache and any(_is_compressed(log_path) for log_path in log_paths):
+                parser.error('--cache needs uncompressed log files')
+            size = sum(os.path.getsize(log_path) for log_path in log_paths if os.path.exists(log_path))
+            with _stage(instrumentation, 'cached analysis' if args.cache else 'parallel analysis', bytes=size) as record:
+                if args.cache:
+                    stats = analyze_file_cached(log_paths[0], message_capacity=args.approx_top,
+                                                group_templates=args.templates, skip_malformed=args.skip_malformed)
+                    for log_path in log_paths[1:]:
+                        stats.merge(analyze_file_cached(log_path, message_capacity=args.approx_top,
+                                                        group_templates=args.templates,
+                                                        skip_malformed=args.skip_malformed))
+                else:
+                    stats = analyze_file_parallel(log_paths, args.workers, args.approx_top, args.templates,
+                                                  args.skip_malformed)
+                if record is not None:
+                    record.lines += stats.total + stats.malformed_count
+            if instrumentation is not None:
+                instrumentation.count('malformed lines', stats.malformed_count)
+            log_analyzer = LogAnalyzer(stats=stats)
+        else:
+            log_parser = open_log_parser(args.filenames, args.skip_malformed, instrumentation, args.format)
+            if args.save_snapshot:
+                log_parser.save_snapshot(args.save_snapshot)
+            log_analyzer = LogAnalyzer(log_parser, message_capacity=args.approx_top, group_templates=args.templates,
+                                       instrumentation=instrumentation)
+            log_analyzer.stats  # aggregate as its own stage rather than inside 'report'
+        with _stage(instrumentation, 'report'):
+            print_summary(log_analyzer, args.top, args.level)
 
-    if args.level:
-        filtered = log_analyzer.filter_by_level(args.level)
-        print(f"\n{args.level} log entries: {len(filtered)}")
\ No newline at end of file
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats('cumulative').print_stats(15)
+    if instrumentation is not None:
+        print(instrumentation.report(), file=sys.stderr)
@@ -0,0 +1,220 @@
+from datetime import datetime, timedelta
+from itertools import islice
+import json
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+Fields = Tuple[str, str, str]
+
+DETECT_LINES = 20
+SYSLOG_SEVERITIES = ['EMERGENCY', 'ALERT', 'CRITICAL', 'ERROR', 'WARNING', 'NOTICE', 'INFO', 'DEBUG']
+_MONTHS = {month: number for number, month in enumerate(
+    ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'], start=1)}
+_EPOCH = datetime(1970, 1, 1)
+
+class LogFormat:
+    """A log line layout, compiled once into a parser returning (timestamp, level, message)"""
+    def __init__(self, name: str, description: str = '') -> None:
+        self.name = name
+        self.description = description
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.name})"
+
+    def parse(self, line: str) -> Fields:
+        """Split a line into (timestamp, level, message), raising ValueError if it doesn't match"""
+        raise NotImplementedError
+
+    def parse_bytes(self, line: bytes) -> Fields:
+        # UnicodeDecodeError is a ValueError, so undecodable lines count as malformed
+        return self.parse(line.decode())
+
+    def _malformed(self, line: str) -> ValueError:
+        return ValueError(f"Malformed {self.name} log entry: {line.strip()}")
+
+class SplitFormat(LogFormat):
+    """Space-separated fields: `timestamp_fields` timestamp words, the level, then the message"""
+    def __init__(self, name: str, timestamp_fields: int = 2, description: str = '') -> None:
+        super().__init__(name, description)
+        self.timestamp_fields = timestamp_fields
+
+    def parse(self, line: str) -> Fields:
+        parts = line.strip().split(' ', self.timestamp_fields + 1)
+        if len(parts) < self.timestamp_fields + 2:
+            raise self._malformed(line)
+        return ' '.join(parts[:self.timestamp_fields]), parts[-2], parts[-1]
+
+class DefaultFormat(SplitFormat):
+    """
+    The default `YYYY-MM-DD HH:MM:SS LEVEL message` layout, with the fast bytes parser.
+
+    parse_bytes only splits on the first three spaces. Repeated levels and
+    messages are answered from a cache of at most `cache_size` decoded
+    strings, which also makes them share one object, and a timestamp is only
+    decoded when it differs from the previous line's. Every reader of the
+    default layout goes through this one parser.
+    """
+    def __init__(self, name: str = 'default', cache_size: int = 100_000) -> None:
+        super().__init__(name, 2, 'YYYY-MM-DD HH:MM:SS LEVEL message')
+        self.cache_size = cache_size
+        self._decoded: Dict[bytes, str] = {}
+        # (raw, decoded) in one tuple so the pair is always replaced together
+        self._last_timestamp: Tuple[Optional[bytes], Optional[str]] = (None, None)
+
+    def parse_bytes(self, line: bytes) -> Fields:
+        parts = line.strip().split(b' ', 3)
+        if len(parts) < 4:
+            raise self._malformed(line.decode(errors='replace'))
+
+        raw_timestamp = parts[0] + b' ' + parts[1]
+        last_raw_timestamp, timestamp = self._last_timestamp
+        if raw_timestamp != last_raw_timestamp:
+            timestamp = raw_timestamp.decode()
+            self._last_timestamp = (raw_timestamp, timestamp)
+        decoded = self._decoded
+        level = decoded.get(parts[2])
+        if level is None:
+            level = self._decode(parts[2])
+        message = decoded.get(parts[3])
+        if message is None:
+            message = self._decode(parts[3])
+        return timestamp, level, message
+
+    def _decode(self, raw: bytes) -> str:
+        """Decode a cache miss, emptying the cache first once it holds cache_size strings"""
+        if len(self._decoded) >= self.cache_size:
+            self._decoded.clear()
+        text = self._decoded[raw] = raw.decode()
+        return text
+
+    def _malformed(self, line: str) -> ValueError:
+        return ValueError(f"Malformed log entry: {line.strip()}")
+
+class RegexFormat(LogFormat):
+    """
+    Lines matched by a precompiled regular expression.
+
+    The pattern needs `timestamp`, `level` and `message` groups, unless a
+    `convert` function builds the fields from the match instead.
+    """
+    def __init__(self, name: str, pattern: str, convert: Optional[Callable[['re.Match[str]'], Fields]] = None,
+                 description: str = '') -> None:
+        super().__init__(name, description)
+        self.pattern = re.compile(pattern)
+        self._convert = convert
+
+    def parse(self, line: str) -> Fields:
+        match = self.pattern.fullmatch(line.strip())
+        if match is None:
+            raise self._malformed(line)
+        if self._convert is not None:
+            return self._convert(match)
+        return match['timestamp'], match['level'], match['message']
+
+class SyslogFormat(RegexFormat):
+    """
+    BSD syslog lines such as "<11>Oct 16 09:23:15 web1 nginx[42]: upstream timed out".
+
+    The level comes from the optional <priority> prefix (INFO without one) and
+    the message keeps the host and program. Syslog timestamps have no year,
+    so `year` (by default the current one) is filled in.
+    """
+    def __init__(self, name: str = 'syslog', year: Optional[int] = None) -> None:
+        super().__init__(name, r'(?:<(?P<priority>\d{1,3})>)?(?P<month>[A-Z][a-z]{2}) +(?P<day>\d{1,2}) '
+                               r'(?P<time>\d\d:\d\d:\d\d) (?P<message>\S+ .+)',
+                         self._fields, 'BSD syslog (RFC 3164)')
+        self.year = year
+
+    def _fields(self, match: 're.Match[str]') -> Fields:
+        month = _MONTHS.get(match['month'])
+        if month is None:
+            raise self._malformed(match.string)
+        year = self.year or datetime.now().year
+        priority = match['priority']
+        level = SYSLOG_SEVERITIES[int(priority) % 8] if priority is not None else 'INFO'
+        return f"{year:04d}-{month:02d}-{int(match['day']):02d} {match['time']}", level, match['message']
+
+class JsonLinesFormat(LogFormat):
+    """
+    One JSON object per line.
+
+    Each field is read from the first of its candidate keys that is present.
+    Numeric timestamps are taken as epoch seconds.
+    """
+    def __init__(self, name: str = 'jsonl', timestamp_keys: Sequence[str] = ('timestamp', '@timestamp', 'time', 'ts'),
+                 level_keys: Sequence[str] = ('level', 'severity', 'levelname'),
+                 message_keys: Sequence[str] = ('message', 'msg')) -> None:
+        super().__init__(name, 'JSON lines')
+        self.timestamp_keys = timestamp_keys
+        self.level_keys = level_keys
+        self.message_keys = message_keys
+
+    def _field(self, record: dict, keys: Sequence[str], line: str) -> object:
+        for key in keys:
+            if key in record:
+                return record[key]
+        raise self._malformed(line)
+
+    def parse(self, line: str) -> Fields:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            raise self._malformed(line)
+        if not isinstance(record, dict):
+            raise self._malformed(line)
+
+        timestamp = self._field(record, self.timestamp_keys, line)
+        if isinstance(timestamp, (int, float)):
+            timestamp = (_EPOCH + timedelta(seconds=timestamp)).isoformat(sep=' ')
+        return str(timestamp), str(self._field(record, self.level_keys, line)).upper(), \
+            str(self._field(record, self.message_keys, line))
+
+_FORMATS: Dict[str, LogFormat] = {}
+
+def register_format(log_format: LogFormat, replace: bool = False) -> LogFormat:
+    """Make a format available by name to LogParser and the CLI's --format"""
+    if log_format.name in _FORMATS and not replace:
+        raise ValueError(f"Log format already registered: {log_format.name}")
+    _FORMATS[log_format.name] = log_format
+    return log_format
+
+def get_format(name: str) -> LogFormat:
+    try:
+        return _FORMATS[name]
+    except KeyError:
+        raise ValueError(f"Unknown log format: {name} (available: {', '.join(_FORMATS)})")
+
+def available_formats() -> List[str]:
+    return list(_FORMATS)
+
+def _has_valid_timestamp(log_format: LogFormat, line: str) -> bool:
+    try:
+        datetime.fromisoformat(log_format.parse(line)[0])
+    except ValueError:
+        return False
+    return True
+
+def detect_format(lines: Iterable[str]) -> LogFormat:
+    """
+    Pick the registered format that parses the most of the first non-blank lines.
+
+    A line only counts when its timestamp is a valid ISO date, since the
+    default layout happily splits most other formats into four words. Ties
+    go to the format registered first, and no lines at all means the default.
+    """
+    sample = list(islice((line for line in lines if line.strip()), DETECT_LINES))
+    if not sample:
+        return DEFAULT_FORMAT
+    scores = {name: sum(_has_valid_timestamp(log_format, line) for line in sample)
+              for name, log_format in _FORMATS.items()}
+    best = max(scores, key=scores.get, default=None)
+    if best is None or scores[best] == 0:
+        raise ValueError("Could not detect the log format")
+    return _FORMATS[best]
+
+DEFAULT_FORMAT = register_format(DefaultFormat())
+register_format(RegexFormat('iso8601', r'(?P<timestamp>\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d(?:[.,]\d+)?(?:Z|[+-]\d\d:?\d\d)?)'
+                                       r'\s+\[?(?P<level>[A-Za-z]+)\]?:?\s+(?P<message>.+)',
+                            description='ISO-8601 timestamp, level (optionally [bracketed]) and message'))
+register_format(SyslogFormat())
+register_format(JsonLinesFormat())
@@ -0,0 +1,47 @@
+import re
+from typing import Dict
+
+# Order matters: the more specific token shapes must be tried before plain numbers
+_VARIABLE_TOKENS = re.compile(
+    r'(?P<UUID>\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b)'
+    r'|(?P<IP>\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b)'
+    r'|(?P<HEX>\b0x[0-9a-fA-F]+\b|\b(?=[0-9a-fA-F]*[a-fA-F])(?=[0-9a-fA-F]*\d)[0-9a-fA-F]{8,}\b)'
+    r'|(?P<NUM>(?<![A-Za-z])[-+]?\d+(?:\.\d+)?)'
+)
+
+def _placeholder(match: 're.Match[str]') -> str:
+    return f"<{match.lastgroup}>"
+
+class TemplateMiner:
+    """
+    Collapse log messages into templates by masking their variable tokens.
+
+    UUIDs, IP addresses, hex ids and numbers are replaced with placeholders, so
+    "Slow query detected 812ms" and "Slow query detected 95ms" both become
+    "Slow query detected <NUM>ms". Messages already seen are answered from a
+    cache, and identical templates share one string object.
+    """
+    def __init__(self, cache_size: int = 100_000) -> None:
+        self.cache_size = cache_size
+        self._cache: Dict[str, str] = {}
+        self._templates: Dict[str, str] = {}
+
+    def __repr__(self) -> str:
+        return f"TemplateMiner({len(self._templates)} templates)"
+
+    def __len__(self) -> int:
+        """Number of distinct templates seen so far"""
+        return len(self._templates)
+
+    def template(self, message: str) -> str:
+        """Returns the template for a message"""
+        template = self._cache.get(message)
+        if template is not None:
+            return template
+
+        template = _VARIABLE_TOKENS.sub(_placeholder, message)
+        template = self._templates.setdefault(template, template)
+        if len(self._cache) >= self.cache_size:
+            self._cache.clear()
+        self._cache[message] = template
+        return template
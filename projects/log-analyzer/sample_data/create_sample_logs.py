@@ -1,10 +1,13 @@
-import random
+import argparse
 from datetime import datetime, timedelta
+from itertools import accumulate
+import random
+from typing import Dict, Iterator, List, Optional
 
 levels = ['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL']
 messages = {
     'ERROR': [
-        'Database connection failed', 
+        'Database connection failed',
         'Failed to process payment',
         'Authentication timeout',
         'API rate limit exceeded'
@@ -36,12 +39,96 @@ messages = {
     ]
 }
 
-start_time = datetime.now()
-with open('sample_logs_larger.txt', 'w') as f:
-    for i in range(500):
-        timestamp = start_time + timedelta(seconds=i*2)
-        level = random.choice(levels)
-        message = random.choice(messages[level])
-        f.write(f"{timestamp.strftime('%Y-%m-%d %H:%M:%S')} {level} {message}\n")
+DEFAULT_LEVEL_WEIGHTS = {level: 1.0 for level in levels}
+BATCH_SIZE = 10_000
+
+def parse_level_weights(spec: str) -> Dict[str, float]:
+    """Parse a level distribution such as 'DEBUG=30,INFO=50,WARNING=12,ERROR=7,CRITICAL=1'"""
+    weights = {}
+    for part in spec.split(','):
+        level, _, weight = part.partition('=')
+        if level not in messages or not weight:
+            raise ValueError(f"Invalid level weight: {part!r}")
+        weights[level] = float(weight)
+    return weights
+
+def _message_pool(level: str, cardinality: int) -> List[str]:
+    """`cardinality` distinct messages for a level, built from its base messages plus a variable id"""
+    base = messages[level]
+    if cardinality <= len(base):
+        return base[:cardinality]
+    return base + [f"{base[i % len(base)]} id={i}" for i in range(len(base), cardinality)]
+
+def generate_log_lines(count: int, seed: Optional[int] = None, level_weights: Optional[Dict[str, float]] = None,
+                       cardinality: int = 5, zipf: float = 0.0, start_time: Optional[datetime] = None,
+                       interval: float = 2.0) -> Iterator[str]:
+    """
+    Yield synthetic log lines in the "date time LEVEL message" format.
+
+    Args:
+        count: Number of lines to generate
+        seed: Random seed, for reproducible files
+        level_weights: Relative frequency of each level
+        cardinality: Distinct messages per level
+        zipf: Skew of the message distribution; 0 is uniform, ~1 is typical of
+            real logs where a few messages dominate
+        start_time: Timestamp of the first line
+        interval: Seconds between consecutive lines
+    """
+    rng = random.Random(seed)
+    level_weights = level_weights or DEFAULT_LEVEL_WEIGHTS
+    level_total = sum(level_weights.values())
+
+    # Every (level, message) pair gets one weight, so a whole batch of lines is
+    # drawn with a single rng.choices call
+    pairs, pair_weights = [], []
+    for level, level_weight in level_weights.items():
+        pool = _message_pool(level, cardinality)
+        zipf_weights = [1.0 / (rank + 1) ** zipf for rank in range(len(pool))]
+        zipf_total = sum(zipf_weights)
+        for message, weight in zip(pool, zipf_weights):
+            pairs.append(f"{level} {message}\n")
+            pair_weights.append(level_weight / level_total * weight / zipf_total)
+    cum_weights = list(accumulate(pair_weights))
+    start_time = start_time or datetime(2025, 10, 16)
+    start_day = datetime(start_time.year, start_time.month, start_time.day)
+    start_offset = (start_time - start_day).seconds
+
+    # Timestamps are assembled from a per-day date prefix and a precomputed
+    # table of clock times, since strftime per line dominates the run time
+    clock = [f" {h:02d}:{m:02d}:{s:02d} " for h in range(24) for m in range(60) for s in range(60)]
+    current_day, date_prefix = None, ''
+    produced = 0
+    while produced < count:
+        batch = min(BATCH_SIZE, count - produced)
+        for pair in rng.choices(pairs, cum_weights=cum_weights, k=batch):
+            day, second = divmod(start_offset + int(produced * interval), 86400)
+            if day != current_day:
+                date_prefix = (start_day + timedelta(days=day)).strftime('%Y-%m-%d')
+                current_day = day
+            produced += 1
+            yield date_prefix + clock[second] + pair
+
+def write_sample_logs(path: str, count: int, **options) -> int:
+    """Write generated log lines to path and return the number of bytes written"""
+    written = 0
+    with open(path, 'w', buffering=1 << 20) as f:
+        for line in generate_log_lines(count, **options):
+            written += f.write(line)
+    return written
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate synthetic log files.')
+    parser.add_argument('--output', default='sample_logs_larger.txt', help='File to write')
+    parser.add_argument('--lines', type=int, default=500, help='Number of log lines')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed for reproducible output')
+    parser.add_argument('--levels', type=parse_level_weights, default=None,
+                        help='Level distribution, e.g. DEBUG=30,INFO=50,WARNING=12,ERROR=7,CRITICAL=1')
+    parser.add_argument('--cardinality', type=int, default=5, help='Distinct messages per level')
+    parser.add_argument('--zipf', type=float, default=0.0, help='Message skew (0 = uniform)')
+
+    args = parser.parse_args()
 
-print("Created sample logs file: 'sample_logs_larger.txt'")
\ No newline at end of file
+    size = write_sample_logs(args.output, args.lines, seed=args.seed, level_weights=args.levels,
+                             cardinality=args.cardinality, zipf=args.zipf)
+    print(f"Created sample logs file: '{args.output}' ({args.lines} lines, {size / 1e6:.1f} MB)")
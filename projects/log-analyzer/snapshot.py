@@ -0,0 +1,153 @@
+from array import array
+from itertools import accumulate
+import json
+import mmap
+import os
+import sys
+from typing import Dict, List, Optional, Sequence
+
+SNAPSHOT_MAGIC = b'LASNAP\n'
+SNAPSHOT_VERSION = 2
+SNAPSHOT_SUFFIX = '.lasnap'
+ALIGNMENT = 8
+
+def _padding(length: int) -> bytes:
+    return b'\0' * (-length % ALIGNMENT)
+
+def write_snapshot(snapshot_path: str, epochs: Sequence[float], level_names: List[str], level_codes: array,
+                   level_postings: List[array], message_ids: array, messages: List[str],
+                   timestamp_ids: array, timestamps: List[str]) -> None:
+    """
+    Atomically write parsed log columns as a snapshot readable by Snapshot.
+
+    The file is the magic line, the header length, a JSON header and then one
+    8-byte aligned section per column: epochs ('d'), level codes ('H', or 'I'
+    past 65,536 levels), message ids ('I'), the concatenated level posting
+    lists ('Q') with their bounds, the UTF-8 message dictionary with its
+    bounds, and likewise the timestamp ids ('I') and dictionary of the
+    original timestamps that their epoch doesn't render back to. The header
+    stays the same size however many entries there are.
+
+    Args:
+        epochs: Timestamp of every entry as epoch seconds
+        level_names: Level of each level code
+        level_codes: Level code of every entry
+        level_postings: Entry indices of each level code, in file order
+        message_ids: Index into `messages` of every entry's message
+        messages: Distinct messages
+        timestamp_ids: For every entry, 0 if its timestamp is the canonical
+            rendering of its epoch, otherwise 1 + its index into `timestamps`;
+            empty if every timestamp is canonical
+        timestamps: Distinct original timestamps that are not canonical
+    """
+    encoded = [message.encode() for message in messages]
+    encoded_timestamps = [timestamp.encode() for timestamp in timestamps]
+    sections = [
+        ('epochs', 'd', array('d', epochs).tobytes()),
+        ('level_codes', level_codes.typecode, level_codes.tobytes()),
+        ('message_ids', 'I', message_ids.tobytes()),
+        ('postings', 'Q', b''.join(posting.tobytes() for posting in level_postings)),
+        ('posting_bounds', 'Q', array('Q', accumulate((len(posting) for posting in level_postings), initial=0)).tobytes()),
+        ('message_bounds', 'Q', array('Q', accumulate((len(message) for message in encoded), initial=0)).tobytes()),
+        ('message_data', None, b''.join(encoded)),
+        ('timestamp_ids', 'I', timestamp_ids.tobytes()),
+        ('timestamp_bounds', 'Q',
+         array('Q', accumulate((len(timestamp) for timestamp in encoded_timestamps), initial=0)).tobytes()),
+        ('timestamp_data', None, b''.join(encoded_timestamps)),
+    ]
+
+    layout, offset = {}, 0
+    for name, typecode, data in sections:
+        layout[name] = [offset, len(data), typecode]
+        offset += len(data) + len(_padding(len(data)))
+    header = json.dumps({
+        'version': SNAPSHOT_VERSION,
+        'byteorder': sys.byteorder,
+        'count': len(level_codes),
+        'level_names': level_names,
+        'sections': layout,
+    }).encode()
+    # Pad with spaces, which JSON ignores, so the sections start 8-byte aligned
+    header += b' ' * (-(len(SNAPSHOT_MAGIC) + 8 + len(header)) % ALIGNMENT)
+
+    temp_path = snapshot_path + '.tmp'
+    with open(temp_path, 'wb') as snapshot_file:
+        snapshot_file.write(SNAPSHOT_MAGIC + len(header).to_bytes(8, 'little') + header)
+        for _, _, data in sections:
+            snapshot_file.write(data)
+            snapshot_file.write(_padding(len(data)))
+    os.replace(temp_path, snapshot_path)
+
+class Snapshot:
+    """
+    Memory-mapped columns of a snapshot written by write_snapshot.
+
+    Columns are memoryviews straight into the map, so opening a snapshot only
+    reads its header; messages are decoded from the dictionary on first use.
+    """
+    def __init__(self, snapshot_path: str) -> None:
+        self._file = open(snapshot_path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Not a log snapshot: {snapshot_path}")
+        if self._map[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            self.close()
+            raise ValueError(f"Not a log snapshot: {snapshot_path}")
+
+        header_start = len(SNAPSHOT_MAGIC) + 8
+        header_length = int.from_bytes(self._map[len(SNAPSHOT_MAGIC):header_start], 'little')
+        header = json.loads(self._map[header_start:header_start + header_length])
+        if header['version'] != SNAPSHOT_VERSION or header['byteorder'] != sys.byteorder:
+            self.close()
+            raise ValueError(f"Unsupported snapshot version or byte order: {snapshot_path}")
+
+        self.level_names: List[str] = header['level_names']
+        self._count = header['count']
+        self._messages: Dict[int, str] = {}
+        self._views = [memoryview(self._map)]
+        data_start = header_start + header_length
+        for name, (offset, length, typecode) in header['sections'].items():
+            view = self._views[0][data_start + offset:data_start + offset + length]
+            if typecode is not None:
+                view = view.cast(typecode)
+            self._views.append(view)
+            setattr(self, name, view)
+
+    def __repr__(self) -> str:
+        return f"Snapshot({self._file.name}, {self._count} entries)"
+
+    def __len__(self) -> int:
+        return self._count
+
+    def message(self, message_id: int) -> str:
+        message = self._messages.get(message_id)
+        if message is None:
+            start, end = self.message_bounds[message_id], self.message_bounds[message_id + 1]
+            message = self._messages[message_id] = str(self.message_data[start:end], 'utf-8')
+        return message
+
+    @property
+    def has_timestamp_overrides(self) -> bool:
+        return len(self.timestamp_ids) > 0
+
+    def timestamp_override(self, index: int) -> Optional[str]:
+        """The original timestamp of an entry, or None if it is the canonical rendering of its epoch"""
+        if not self.has_timestamp_overrides:
+            return None
+        timestamp_id = self.timestamp_ids[index]
+        if timestamp_id == 0:
+            return None
+        start, end = self.timestamp_bounds[timestamp_id - 1], self.timestamp_bounds[timestamp_id]
+        return str(self.timestamp_data[start:end], 'utf-8')
+
+    def posting(self, level_code: int) -> memoryview:
+        """Indices of the entries with a level code, in file order"""
+        return self.postings[self.posting_bounds[level_code]:self.posting_bounds[level_code + 1]]
+
+    def close(self) -> None:
+        for view in reversed(getattr(self, '_views', [])):
+            view.release()
+        self._map.close()
+        self._file.close()
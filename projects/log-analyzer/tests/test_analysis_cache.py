@@ -0,0 +1,42 @@
+from array import array
+
+from analysis_cache import default_cache_path, file_fingerprint, is_same_file, load_cache, save_cache
+
+def test_save_and_load_round_trip(tmp_path):
+    cache_path = str(tmp_path / 'app.log.lacache')
+    offsets = array('Q', [0, 40, 81])
+    save_cache(cache_path, {'offset': 120}, offsets)
+    header, loaded_offsets = load_cache(cache_path)
+    assert header['offset'] == 120
+    assert loaded_offsets == offsets
+
+def test_load_missing_or_corrupt_cache(tmp_path):
+    assert load_cache(str(tmp_path / 'missing.lacache')) is None
+    corrupt = tmp_path / 'corrupt.lacache'
+    corrupt.write_bytes(b'not json\n')
+    assert load_cache(str(corrupt)) is None
+
+def test_default_cache_path():
+    assert default_cache_path('/var/log/app.log') == '/var/log/app.log.lacache'
+
+def test_appended_file_is_same_file(tmp_path):
+    log_file = tmp_path / 'app.log'
+    log_file.write_text("2025-10-16 09:23:15 ERROR Disk full\n")
+    before = file_fingerprint(str(log_file))
+    with open(log_file, 'a') as f:
+        f.write("2025-10-16 09:23:16 INFO Recovered\n")
+    assert is_same_file(before, file_fingerprint(str(log_file)), str(log_file))
+
+def test_rewritten_file_is_not_same_file(tmp_path):
+    log_file = tmp_path / 'app.log'
+    log_file.write_text("2025-10-16 09:23:15 ERROR Disk full\n")
+    before = file_fingerprint(str(log_file))
+    log_file.write_text("2025-10-17 00:00:00 INFO Started again, longer\n")
+    assert not is_same_file(before, file_fingerprint(str(log_file)), str(log_file))
+
+def test_truncated_file_is_not_same_file(tmp_path):
+    log_file = tmp_path / 'app.log'
+    log_file.write_text("2025-10-16 09:23:15 ERROR Disk full\n2025-10-16 09:23:16 INFO Recovered\n")
+    before = file_fingerprint(str(log_file))
+    log_file.write_text("2025-10-16 09:23:15 ERROR Disk full\n")
+    assert not is_same_file(before, file_fingerprint(str(log_file)), str(log_file))
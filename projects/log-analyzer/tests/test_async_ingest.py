@@ -0,0 +1,56 @@
+import gzip
+import os
+import threading
+
+import pytest
+
+from async_ingest import ingest_sources
+
+@pytest.fixture
+def service_logs(tmp_path):
+    (tmp_path / 'api.log').write_text(
+        "2025-10-16 09:23:15 ERROR Database connection failed\n"
+        "2025-10-16 09:23:16 INFO Request completed\n"
+        "\n"
+        "2025-10-16 09:23:17 ERROR Database connection failed\n"
+    )
+    with gzip.open(tmp_path / 'worker.log.gz', 'wt') as f:
+        f.write("2025-10-16 09:23:15 WARNING Queue backlog growing\n"
+                "garbage\n"
+                "2025-10-16 09:23:18 INFO Request completed")
+    return tmp_path
+
+def test_per_source_and_global_counts(service_logs):
+    api, worker = str(service_logs / 'api.log'), str(service_logs / 'worker.log.gz')
+    result = ingest_sources([api, worker])
+    assert result.source_stats[api].level_counts == {'ERROR': 2, 'INFO': 1}
+    assert result.source_stats[worker].level_counts == {'WARNING': 1, 'INFO': 1}
+    assert result.malformed_counts == {api: 1, worker: 1}
+    assert result.global_stats.total == 5
+    assert result.analyzer.top_messages(2) == [('Database connection failed', 2), ('Request completed', 2)]
+
+def test_small_queue_and_chunks_give_same_counts(service_logs):
+    sources = [str(service_logs / '*.log*')]
+    expected = ingest_sources(sources).global_stats.to_dict()
+    assert ingest_sources(sources, queue_size=1, chunk_size=7).global_stats.to_dict() == expected
+
+def test_missing_source(service_logs):
+    with pytest.raises(FileNotFoundError):
+        ingest_sources([str(service_logs / 'api.log'), str(service_logs / 'missing.log')])
+
+@pytest.mark.skipif(not hasattr(os, 'mkfifo'), reason='needs named pipes')
+def test_named_pipe_source(tmp_path):
+    fifo = str(tmp_path / 'service.pipe')
+    os.mkfifo(fifo)
+
+    def write_pipe():
+        with open(fifo, 'w') as pipe:
+            for i in range(100):
+                pipe.write(f"2025-10-16 09:23:15 INFO Heartbeat {i % 2}\n")
+
+    writer = threading.Thread(target=write_pipe)
+    writer.start()
+    result = ingest_sources([fifo])
+    writer.join()
+    assert result.source_stats[fifo].total == 100
+    assert result.source_stats[fifo].message_counts['Heartbeat 0'] == 50
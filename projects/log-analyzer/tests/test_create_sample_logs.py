@@ -0,0 +1,40 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sample_data'))
+
+from create_sample_logs import generate_log_lines, parse_level_weights, write_sample_logs
+from log_analyzer import LogAnalyzer, LogParser
+
+def test_generated_lines_parse(tmp_path):
+    log_file = tmp_path / 'generated.txt'
+    write_sample_logs(str(log_file), 1000, seed=1)
+    log_analyzer = LogAnalyzer(LogParser(str(log_file)))
+    assert log_analyzer.log_count == 1000
+    assert set(log_analyzer.log_levels) <= {'DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'}
+
+def test_seed_is_reproducible():
+    assert list(generate_log_lines(200, seed=7)) == list(generate_log_lines(200, seed=7))
+    assert list(generate_log_lines(200, seed=7)) != list(generate_log_lines(200, seed=8))
+
+def test_level_weights_and_cardinality():
+    lines = list(generate_log_lines(2000, seed=1, level_weights={'ERROR': 1.0}, cardinality=50))
+    messages = {line.split(' ', 3)[3] for line in lines}
+    assert all(line.split(' ')[2] == 'ERROR' for line in lines)
+    assert 4 < len(messages) <= 50
+
+def test_zipf_skews_messages():
+    lines = list(generate_log_lines(5000, seed=1, level_weights={'INFO': 1.0}, cardinality=100, zipf=1.5))
+    top_count = sum(1 for line in lines if line.endswith(' User login successful\n'))
+    assert top_count > 5000 / 100 * 5
+
+def test_timestamps_roll_over_days():
+    lines = list(generate_log_lines(3, seed=1, interval=43200))
+    assert [line[:19] for line in lines] == ['2025-10-16 00:00:00', '2025-10-16 12:00:00', '2025-10-17 00:00:00']
+
+def test_parse_level_weights():
+    assert parse_level_weights('INFO=3,ERROR=1') == {'INFO': 3.0, 'ERROR': 1.0}
+    with pytest.raises(ValueError):
+        parse_level_weights('VERBOSE=1')
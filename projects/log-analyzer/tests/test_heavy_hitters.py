@@ -0,0 +1,59 @@
+import pytest
+
+from heavy_hitters import SpaceSaving
+
+def test_exact_while_under_capacity():
+    sketch = SpaceSaving(10)
+    for item in ['a', 'b', 'a', 'c', 'a', 'b']:
+        sketch.add(item)
+    assert sketch.top(2) == [('a', 3, 0), ('b', 2, 0)]
+    assert sketch.error_bound == 0
+    assert sketch.total == 6
+
+def test_capacity_is_bounded():
+    sketch = SpaceSaving(5)
+    for i in range(1000):
+        sketch.add(f"request id={i}")
+    assert len(sketch) == 5
+
+def test_heavy_hitters_survive_noise():
+    sketch = SpaceSaving(20)
+    for i in range(2000):
+        sketch.add('Database connection failed')
+        if i % 2 == 0:
+            sketch.add('Cache miss')
+        sketch.add(f"request id={i}")
+    top = sketch.top(2)
+    assert [item for item, _, _ in top] == ['Database connection failed', 'Cache miss']
+    for item, count, error in top:
+        true_count = 2000 if item == 'Database connection failed' else 1000
+        assert count - error <= true_count <= count
+    assert sketch.error_bound <= sketch.total // sketch.capacity
+
+def test_merge_keeps_counts_within_bounds():
+    first, second = SpaceSaving(4), SpaceSaving(4)
+    for i in range(100):
+        first.add('a')
+        second.add('a')
+        second.add('b')
+        first.add(f"noise {i}")
+    first.merge(second)
+    assert first.total == 400
+    assert len(first) <= 4
+    item, count, error = first.top(1)[0]
+    assert item == 'a'
+    assert count - error <= 200 <= count
+
+def test_merge_keeps_ties_in_a_fixed_order():
+    first, second = SpaceSaving(3), SpaceSaving(3)
+    for item in ['x', 'y']:
+        first.add(item)
+    for item in ['y', 'w', 'z']:
+        second.add(item)
+    first.merge(second)
+    # x and w win their ties by coming first: own items, then the other's new ones in order
+    assert first.top(3) == [('x', 2, 1), ('y', 2, 0), ('w', 1, 0)]
+
+def test_invalid_capacity():
+    with pytest.raises(ValueError):
+        SpaceSaving(0)
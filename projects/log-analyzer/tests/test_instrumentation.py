@@ -0,0 +1,42 @@
+import time
+import tracemalloc
+
+from instrumentation import Instrumentation
+
+def test_stage_accumulates_calls_and_volume():
+    instrumentation = Instrumentation()
+    for _ in range(2):
+        with instrumentation.stage('parse', lines=10, bytes=1000) as record:
+            record.lines += 5
+            time.sleep(0.001)
+    record = instrumentation.stages['parse']
+    assert record.calls == 2
+    assert record.lines == 30
+    assert record.bytes == 2000
+    assert record.seconds > 0
+    assert record.lines_per_second == 30 / record.seconds
+
+def test_on_stage_hook_sees_finished_stages():
+    finished = []
+    instrumentation = Instrumentation(on_stage=lambda record: finished.append((record.name, record.calls)))
+    with instrumentation.stage('read'):
+        pass
+    instrumentation.add_time('parse', 0.5, lines=100)
+    assert finished == [('read', 1), ('parse', 1)]
+
+def test_trace_memory_records_stage_peak():
+    instrumentation = Instrumentation(trace_memory=True)
+    with instrumentation.stage('allocate'):
+        data = [str(i) for i in range(10_000)]
+    assert instrumentation.stages['allocate'].peak_memory > 100_000
+    assert not tracemalloc.is_tracing()
+    del data
+
+def test_report_lists_stages_and_counters():
+    instrumentation = Instrumentation()
+    instrumentation.add_time('parse', 2.0, lines=1000, bytes=4_000_000)
+    instrumentation.count('malformed lines', 3)
+    report = instrumentation.report()
+    assert 'parse' in report
+    assert '500' in report and '2.0' in report
+    assert 'malformed lines: 3' in report
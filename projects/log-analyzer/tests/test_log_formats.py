@@ -0,0 +1,67 @@
+import pytest
+
+from log_formats import (DEFAULT_FORMAT, DefaultFormat, JsonLinesFormat, RegexFormat, SyslogFormat, available_formats,
+                         detect_format, get_format, register_format)
+
+def test_default_format():
+    assert DEFAULT_FORMAT.parse("2025-10-16 09:23:15 ERROR Database connection failed\n") == \
+        ('2025-10-16 09:23:15', 'ERROR', 'Database connection failed')
+    with pytest.raises(ValueError):
+        DEFAULT_FORMAT.parse("10/15/25 ERROR")
+
+def test_default_format_parse_bytes_cache_is_bounded():
+    default = DefaultFormat(cache_size=2)
+    for i in range(10):
+        assert default.parse_bytes(f"2025-10-16 09:23:15 ERROR Disk {i} full\n".encode()) == \
+            ('2025-10-16 09:23:15', 'ERROR', f'Disk {i} full')
+    assert len(default._decoded) <= 2
+    with pytest.raises(ValueError):
+        default.parse_bytes(b"\xff\xfe 09:23:15 ERROR Disk full\n")
+
+def test_iso8601_format():
+    iso = get_format('iso8601')
+    assert iso.parse("2025-10-16T09:23:15.123Z [ERROR] Database connection failed") == \
+        ('2025-10-16T09:23:15.123Z', 'ERROR', 'Database connection failed')
+    assert iso.parse("2025-10-16T09:23:15+02:00 WARNING: Slow query") == \
+        ('2025-10-16T09:23:15+02:00', 'WARNING', 'Slow query')
+    with pytest.raises(ValueError):
+        iso.parse("2025-10-16 09:23:15 ERROR no T separator")
+
+def test_syslog_format():
+    syslog = SyslogFormat(year=2025)
+    assert syslog.parse("<11>Oct 16 09:23:15 web1 nginx[42]: upstream timed out") == \
+        ('2025-10-16 09:23:15', 'ERROR', 'web1 nginx[42]: upstream timed out')
+    assert syslog.parse("Oct  6 09:23:15 db1 postgres[9]: checkpoint complete") == \
+        ('2025-10-06 09:23:15', 'INFO', 'db1 postgres[9]: checkpoint complete')
+    with pytest.raises(ValueError):
+        syslog.parse("Foo 16 09:23:15 web1 nginx: bad month")
+
+def test_json_lines_format():
+    jsonl = JsonLinesFormat()
+    assert jsonl.parse('{"timestamp": "2025-10-16T09:23:15Z", "level": "error", "message": "Disk full"}') == \
+        ('2025-10-16T09:23:15Z', 'ERROR', 'Disk full')
+    assert jsonl.parse('{"ts": 1760606595, "severity": "info", "msg": "Started"}') == \
+        ('2025-10-16 09:23:15', 'INFO', 'Started')
+    for line in ['not json', '[1, 2]', '{"level": "info", "msg": "no timestamp"}']:
+        with pytest.raises(ValueError):
+            jsonl.parse(line)
+
+def test_detect_format():
+    assert detect_format(["2025-10-16 09:23:15 ERROR Database connection failed"]) is DEFAULT_FORMAT
+    assert detect_format(["2025-10-16T09:23:15Z ERROR Database connection failed"]).name == 'iso8601'
+    assert detect_format(["<11>Oct 16 09:23:15 web1 nginx[42]: upstream timed out"]).name == 'syslog'
+    assert detect_format(['{"time": "2025-10-16 09:23:15", "level": "info", "msg": "ok"}']).name == 'jsonl'
+    assert detect_format(["", "\n"]) is DEFAULT_FORMAT
+    with pytest.raises(ValueError):
+        detect_format(["no recognisable layout here"])
+
+def test_register_format():
+    pipe = RegexFormat('pipe-test', r'(?P<timestamp>[^|]+)\|(?P<level>[^|]+)\|(?P<message>.*)')
+    register_format(pipe)
+    assert get_format('pipe-test') is pipe
+    assert 'pipe-test' in available_formats()
+    assert pipe.parse("2025-10-16 09:23:15|ERROR|Disk full") == ('2025-10-16 09:23:15', 'ERROR', 'Disk full')
+    with pytest.raises(ValueError):
+        register_format(RegexFormat('pipe-test', r'.*'))
+    with pytest.raises(ValueError):
+        get_format('missing-format')
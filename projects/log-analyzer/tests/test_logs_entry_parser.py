@@ -1,6 +1,15 @@
+import bz2
+import gzip
+import io
+import lzma
+import os
+
 import pytest
+from datetime import datetime
 
-from log_analyzer import LogEntry, LogParser, LogAnalyzer
+from log_analyzer import LogEntry, LogParser, LogAnalyzer, LogStats, LogFollower, LevelIn, TimeRange, Contains, Matches, build_query, merge_by_time, analyze_file_cached, analyze_file_parallel, LogParserView, _split_byte_ranges, _timed_lines
+from instrumentation import Instrumentation
+from log_formats import DEFAULT_FORMAT, SyslogFormat
 
 @pytest.fixture
 def sample_missing_file(tmp_path):
@@ -140,4 +149,617 @@ def test_log_analyzer_empty_file(sample_empty_file):
     log_analyzer = LogAnalyzer(log_parser)
     assert log_analyzer.log_count == 0
     assert log_analyzer.error_count == 0
-    assert log_analyzer.top_messages() == []
\ No newline at end of file
+    assert log_analyzer.top_messages() == []
+
+def test_log_analyzer_single_pass(sample_basic_file):
+    class CountingParser:
+        def __init__(self, entries):
+            self.entries = entries
+            self.scans = 0
+
+        def __len__(self):
+            return len(self.entries)
+
+        def __iter__(self):
+            self.scans += 1
+            return iter(self.entries)
+
+    counting_parser = CountingParser(LogParser(sample_basic_file)[:])
+    log_analyzer = LogAnalyzer(counting_parser)
+    assert log_analyzer.error_count == 2
+    assert log_analyzer.warning_count == 1
+    assert log_analyzer.log_levels['INFO'] == 1
+    assert log_analyzer.top_messages(1) == [('Database connection failed: timeout after 30s', 2)]
+    assert counting_parser.scans == 1
+
+def test_log_stats_add():
+    stats = LogStats()
+    stats.add('ERROR', 'Disk full')
+    stats.add('ERROR', 'Disk full')
+    stats.add('INFO', 'Started')
+    assert stats.total == 3
+    assert stats.level_counts == {'ERROR': 2, 'INFO': 1}
+    assert stats.message_counts['Disk full'] == 2
+
+def test_log_entry_has_no_instance_dict():
+    log_entry = LogEntry("2025-10-16 09:23:15 ERROR Database connection failed: timeout after 30s")
+    assert not hasattr(log_entry, '__dict__')
+
+def test_log_parser_interns_repeated_messages(sample_basic_file):
+    log_parser = LogParser(sample_basic_file)
+    assert log_parser[0].message is log_parser[2].message
+
+def test_log_parser_iteration(sample_basic_file):
+    log_parser = LogParser(sample_basic_file)
+    assert [entry.level for entry in log_parser] == ['ERROR', 'WARNING', 'ERROR', 'INFO', 'DEBUG']
+    assert list(log_parser) == log_parser[:]
+
+def test_lazy_log_parser_matches_eager(sample_basic_file):
+    eager_parser = LogParser(sample_basic_file)
+    lazy_parser = LogParser(sample_basic_file, lazy=True)
+    assert len(lazy_parser) == 5
+    assert lazy_parser[0] == eager_parser[0]
+    assert lazy_parser[-1] == eager_parser[-1]
+    assert lazy_parser[-2:] == eager_parser[-2:]
+    assert list(lazy_parser) == list(eager_parser)
+    lazy_parser.close()
+
+def test_lazy_log_parser_without_trailing_newline(tmp_path):
+    log_file = tmp_path / 'no_newline.txt'
+    log_file.write_text("2025-10-16 09:23:15 ERROR Disk full\n2025-10-16 09:23:16 INFO Recovered")
+    lazy_parser = LogParser(str(log_file), lazy=True)
+    assert len(lazy_parser) == 2
+    assert lazy_parser[1].message == 'Recovered'
+    lazy_parser.close()
+
+def test_lazy_log_parser_empty_file(sample_empty_file):
+    lazy_parser = LogParser(sample_empty_file, lazy=True)
+    assert len(lazy_parser) == 0
+    assert LogAnalyzer(lazy_parser).top_messages() == []
+    lazy_parser.close()
+
+def test_lazy_log_parser_missing_file(sample_missing_file):
+    with pytest.raises(FileNotFoundError):
+        LogParser(sample_missing_file, lazy=True)
+
+def test_log_stats_merge():
+    first = LogStats()
+    first.add('ERROR', 'Disk full')
+    second = LogStats()
+    second.add('ERROR', 'Disk full')
+    second.add('INFO', 'Started')
+    first.merge(second)
+    assert first.total == 3
+    assert first.level_counts == {'ERROR': 2, 'INFO': 1}
+    assert first.message_counts == {'Disk full': 2, 'Started': 1}
+
+def test_split_byte_ranges_align_to_lines(sample_basic_file):
+    ranges = _split_byte_ranges(sample_basic_file, 3)
+    with open(sample_basic_file, 'rb') as f:
+        data = f.read()
+    assert ranges[0][0] == 0
+    assert ranges[-1][1] == len(data)
+    for start, end in ranges:
+        assert start == 0 or data[start - 1:start] == b'\n'
+
+def test_analyze_file_parallel_matches_serial(sample_basic_file):
+    serial = LogAnalyzer(LogParser(sample_basic_file))
+    parallel = LogAnalyzer(stats=analyze_file_parallel(sample_basic_file, 2))
+    assert parallel.log_count == serial.log_count
+    assert parallel.log_levels == serial.log_levels
+    assert parallel.top_messages(5) == serial.top_messages(5)
+
+def test_analyze_file_parallel_empty_file(sample_empty_file):
+    log_analyzer = LogAnalyzer(stats=analyze_file_parallel(sample_empty_file, 2))
+    assert log_analyzer.log_count == 0
+    assert log_analyzer.top_messages() == []
+
+def test_log_analyzer_stats_only_cannot_filter(sample_basic_file):
+    log_analyzer = LogAnalyzer(stats=analyze_file_parallel(sample_basic_file, 2))
+    with pytest.raises(ValueError):
+        log_analyzer.filter_by_level('ERROR')
+
+def test_log_follower_reads_appended_lines(tmp_path):
+    log_file = tmp_path / 'growing.txt'
+    log_file.write_text("2025-10-16 09:23:15 ERROR Disk full\n")
+    follower = LogFollower(str(log_file))
+    assert follower.poll() == 1
+
+    with open(log_file, 'a') as f:
+        f.write("2025-10-16 09:23:16 ERROR Disk full\n2025-10-16 09:23:17 INFO Rec")
+    assert follower.poll() == 1
+    assert follower.stats.level_counts == {'ERROR': 2}
+
+    with open(log_file, 'a') as f:
+        f.write("overed\n")
+    assert follower.poll() == 1
+    assert follower.stats.message_counts['Recovered'] == 1
+    assert follower.poll() == 0
+
+def test_log_follower_reads_backlog_in_chunks(tmp_path):
+    log_file = tmp_path / 'app.log'
+    log_file.write_text("2025-10-16 09:23:15 ERROR Disk full\n" * 20 + "2025-10-16 09:23:16 INFO Rec")
+    follower = LogFollower(str(log_file), chunk_size=16)
+    assert follower.poll() == 20
+    assert follower.stats.level_counts == {'ERROR': 20}
+    with open(log_file, 'a') as f:
+        f.write("overed\n")
+    assert follower.poll() == 1
+    assert follower.stats.message_counts['Recovered'] == 1
+
+def test_log_follower_restarts_after_truncation(tmp_path):
+    log_file = tmp_path / 'rotated.txt'
+    log_file.write_text("2025-10-16 09:23:15 ERROR Disk full\n2025-10-16 09:23:16 ERROR Disk full\n")
+    follower = LogFollower(str(log_file))
+    follower.poll()
+    log_file.write_text("2025-10-16 09:30:00 INFO Started\n")
+    follower.poll()
+    assert follower.stats.total == 1
+    assert follower.stats.level_counts == {'INFO': 1}
+
+def test_log_follower_restarts_after_rotation_to_longer_file(tmp_path):
+    log_file = tmp_path / 'app.log'
+    log_file.write_text("2025-10-16 09:23:15 INFO old\n")
+    follower = LogFollower(str(log_file))
+    follower.poll()
+    os.rename(log_file, tmp_path / 'app.log.1')
+    assert follower.poll() == 0
+    log_file.write_text("2025-10-16 09:30:00 INFO new1\n2025-10-16 09:30:01 INFO new2\n")
+    assert follower.poll() == 2
+    assert follower.stats.message_counts == {'new1': 1, 'new2': 1}
+
+def test_log_follower_counts_malformed_lines(tmp_path):
+    log_file = tmp_path / 'malformed.txt'
+    log_file.write_text("garbage\n2025-10-16 09:23:15 ERROR Disk full\n")
+    follower = LogFollower(str(log_file))
+    assert follower.poll() == 1
+    assert follower.malformed_count == 1
+
+def test_log_parser_between(sample_basic_file):
+    log_parser = LogParser(sample_basic_file)
+    window = log_parser.between("2025-10-16 09:23:18", "2025-10-16 09:23:22")
+    assert [entry.timestamp for entry in window] == ["2025-10-16 09:23:18", "2025-10-16 09:23:21"]
+    assert log_parser.between("2025-10-17 00:00:00", "2025-10-18 00:00:00") == []
+
+def test_log_parser_between_unsorted_file(tmp_path):
+    log_file = tmp_path / 'unsorted.txt'
+    log_file.write_text(
+        "2025-10-16 09:30:00 INFO Late\n"
+        "2025-10-16 09:10:00 INFO Early\n"
+        "not-a-date 09:20:00 INFO Unparseable\n"
+        "2025-10-16 09:20:00 ERROR Middle\n"
+    )
+    log_parser = LogParser(str(log_file))
+    window = log_parser.between(datetime(2025, 10, 16, 9, 0), datetime(2025, 10, 16, 9, 25))
+    assert [entry.message for entry in window] == ['Early', 'Middle']
+
+def test_log_parser_between_invalid_timestamp(sample_basic_file):
+    with pytest.raises(ValueError):
+        LogParser(sample_basic_file).between("yesterday", "today")
+
+def test_log_analyzer_time_slice(sample_basic_file):
+    log_analyzer = LogAnalyzer(LogParser(sample_basic_file))
+    window = log_analyzer.time_slice("2025-10-16 09:23:00", "2025-10-16 09:24:00")
+    assert window.log_count == 4
+    assert window.log_levels == {'ERROR': 2, 'WARNING': 1, 'INFO': 1}
+
+def test_log_analyzer_level_histogram(sample_basic_file):
+    log_analyzer = LogAnalyzer(LogParser(sample_basic_file))
+    assert log_analyzer.level_histogram('minute') == {
+        "2025-10-16 09:23:00": {'ERROR': 2, 'WARNING': 1, 'INFO': 1},
+        "2025-10-16 09:24:00": {'DEBUG': 1},
+    }
+    assert log_analyzer.level_histogram('hour') == {
+        "2025-10-16 09:00:00": {'ERROR': 2, 'WARNING': 1, 'INFO': 1, 'DEBUG': 1},
+    }
+    with pytest.raises(ValueError):
+        log_analyzer.level_histogram('fortnight')
+
+@pytest.fixture
+def rotated_logs(tmp_path):
+    (tmp_path / 'app.log').write_text("2025-10-16 09:30:00 INFO Newest\n")
+    with gzip.open(tmp_path / 'app.log.1.gz', 'wt') as f:
+        f.write("2025-10-16 09:20:00 ERROR Middle\n")
+    with bz2.open(tmp_path / 'app.log.2.bz2', 'wt') as f:
+        f.write("2025-10-16 09:10:00 WARNING Older\n")
+    with lzma.open(tmp_path / 'app.log.10.xz', 'wt') as f:
+        f.write("2025-10-16 09:00:00 DEBUG Oldest\n")
+    return tmp_path
+
+def test_log_parser_glob_orders_rotated_files(rotated_logs):
+    log_parser = LogParser(str(rotated_logs / 'app.log*'))
+    assert [entry.message for entry in log_parser] == ['Oldest', 'Older', 'Middle', 'Newest']
+
+def test_log_parser_multiple_paths(rotated_logs, sample_basic_file):
+    log_parser = LogParser([str(rotated_logs / 'app.log.1.gz'), sample_basic_file])
+    assert len(log_parser) == 6
+    assert log_parser[0].message == 'Middle'
+    assert log_parser[-1].level == 'DEBUG'
+
+def test_log_parser_missing_file_in_list(sample_basic_file, sample_missing_file):
+    with pytest.raises(FileNotFoundError):
+        LogParser([sample_basic_file, sample_missing_file])
+
+def test_lazy_log_parser_rejects_compressed(rotated_logs):
+    with pytest.raises(ValueError):
+        LogParser(str(rotated_logs / 'app.log.1.gz'), lazy=True)
+
+def test_analyze_file_parallel_compressed(rotated_logs):
+    stats = analyze_file_parallel(str(rotated_logs / 'app.log*'), 2)
+    assert stats.total == 4
+    assert stats.level_counts == {'DEBUG': 1, 'WARNING': 1, 'ERROR': 1, 'INFO': 1}
+
+def test_log_analyzer_top_messages_ties_keep_first_seen_order(sample_basic_file):
+    log_analyzer = LogAnalyzer(LogParser(sample_basic_file))
+    assert log_analyzer.top_messages(3) == [
+        ('Database connection failed: timeout after 30s', 2),
+        ('Retrying connection attempt 1 of 3', 1),
+        ('Application started successfully', 1),
+    ]
+
+def test_log_analyzer_approximate_top_messages(sample_basic_file):
+    log_analyzer = LogAnalyzer(LogParser(sample_basic_file), message_capacity=3)
+    assert log_analyzer.stats.is_approximate
+    true_counts = {'Database connection failed: timeout after 30s': 2}
+    top_messages = dict(log_analyzer.top_messages(3))
+    assert 'Database connection failed: timeout after 30s' in top_messages
+    for message, count in top_messages.items():
+        assert count - log_analyzer.message_error_bound <= true_counts.get(message, 1) <= count
+    assert log_analyzer.error_count == 2
+
+def test_analyze_file_parallel_approximate(sample_basic_file):
+    stats = analyze_file_parallel(sample_basic_file, 2, message_capacity=10)
+    assert stats.is_approximate
+    assert stats.top_messages(1) == [('Database connection failed: timeout after 30s', 2)]
+    assert stats.message_error_bound == 0
+
+def test_log_stats_merge_rejects_mixed_modes():
+    with pytest.raises(ValueError):
+        LogStats().merge(LogStats(message_capacity=5))
+
+def test_most_common_log_message_empty(sample_empty_file):
+    with pytest.raises(ValueError):
+        LogAnalyzer(LogParser(sample_empty_file)).most_common_log_message
+
+@pytest.fixture
+def sample_variable_messages_file(tmp_path):
+    variable_file = tmp_path / 'variable_file.txt'
+    variable_file.write_text(
+        "2025-10-16 09:23:15 WARNING Slow query detected 812ms\n"
+        "2025-10-16 09:23:16 WARNING Slow query detected 95ms\n"
+        "2025-10-16 09:23:17 INFO Processing user request id=12345\n"
+        "2025-10-16 09:23:18 WARNING Slow query detected 40ms\n"
+    )
+    return str(variable_file)
+
+def test_log_analyzer_top_templates(sample_variable_messages_file):
+    log_analyzer = LogAnalyzer(LogParser(sample_variable_messages_file))
+    assert log_analyzer.top_messages(1)[0][1] == 1
+    assert log_analyzer.top_templates(2) == [
+        ('Slow query detected <NUM>ms', 3),
+        ('Processing user request id=<NUM>', 1),
+    ]
+
+def test_log_analyzer_group_templates(sample_variable_messages_file):
+    log_analyzer = LogAnalyzer(LogParser(sample_variable_messages_file), group_templates=True)
+    assert log_analyzer.top_messages(1) == [('Slow query detected <NUM>ms', 3)]
+    assert len(log_analyzer.stats.message_counts) == 2
+
+def test_analyze_file_parallel_group_templates(sample_variable_messages_file):
+    stats = analyze_file_parallel(sample_variable_messages_file, 2, group_templates=True)
+    assert stats.top_messages(1) == [('Slow query detected <NUM>ms', 3)]
+
+def test_analyze_file_cached_resumes_appended_file(tmp_path, monkeypatch):
+    log_file = tmp_path / 'app.log'
+    log_file.write_text("2025-10-16 09:23:15 ERROR Disk full\n2025-10-16 09:23:16 INFO Started\n")
+    first = analyze_file_cached(str(log_file))
+    assert first.total == 2
+    assert (tmp_path / 'app.log.lacache').exists()
+
+    with open(log_file, 'a') as f:
+        f.write("2025-10-16 09:23:17 ERROR Disk full\n")
+    parsed = []
+    original_parse = DEFAULT_FORMAT.parse_bytes
+    monkeypatch.setattr(DEFAULT_FORMAT, 'parse_bytes', lambda line: parsed.append(line) or original_parse(line))
+    second = analyze_file_cached(str(log_file))
+    assert parsed == [b"2025-10-16 09:23:17 ERROR Disk full\n"]
+    assert second.total == 3
+    assert second.level_counts == {'ERROR': 2, 'INFO': 1}
+    assert second.message_counts['Disk full'] == 2
+
+def test_log_parser_glob_skips_cache_and_snapshot_files(rotated_logs):
+    analyze_file_cached(str(rotated_logs / 'app.log'))
+    (rotated_logs / 'app.log.lasnap').write_bytes(b'\x00snapshot')
+    (rotated_logs / 'app.log.lacache.tmp').write_bytes(b'\x00partial')
+    log_parser = LogParser(str(rotated_logs / 'app.log*'))
+    assert [entry.message for entry in log_parser] == ['Oldest', 'Older', 'Middle', 'Newest']
+    assert analyze_file_parallel(str(rotated_logs / 'app.log*'), 2).total == 4
+    # The same files listed one by one, as the shell expands an unquoted glob
+    shell_expanded = sorted(str(path) for path in rotated_logs.glob('app.log*'))
+    assert len(shell_expanded) == 7
+    assert analyze_file_parallel(shell_expanded, 2).total == 4
+    with pytest.raises(ValueError, match="No log files"):
+        LogParser(str(rotated_logs / 'app.log.lacache'))
+
+def test_analyze_file_cached_unchanged_file_parses_nothing(sample_basic_file, monkeypatch):
+    expected = analyze_file_cached(sample_basic_file)
+    monkeypatch.setattr(DEFAULT_FORMAT, 'parse_bytes', lambda line: pytest.fail('file was re-parsed'))
+    cached = analyze_file_cached(sample_basic_file)
+    assert cached.to_dict() == expected.to_dict()
+
+def test_analyze_file_cached_rebuilds_after_truncation(tmp_path):
+    log_file = tmp_path / 'app.log'
+    log_file.write_text("2025-10-16 09:23:15 ERROR Disk full\n2025-10-16 09:23:16 ERROR Disk full\n")
+    analyze_file_cached(str(log_file))
+    log_file.write_text("2025-10-17 00:00:00 INFO Rotated\n")
+    stats = analyze_file_cached(str(log_file))
+    assert stats.total == 1
+    assert stats.level_counts == {'INFO': 1}
+
+def test_analyze_file_cached_partial_last_line(tmp_path):
+    log_file = tmp_path / 'app.log'
+    log_file.write_text("2025-10-16 09:23:15 ERROR Disk full\n2025-10-16 09:23:16 INFO Rec")
+    assert analyze_file_cached(str(log_file)).total == 2
+    assert analyze_file_cached(str(log_file)).total == 2
+    with open(log_file, 'a') as f:
+        f.write("overed\n")
+    stats = analyze_file_cached(str(log_file))
+    assert stats.total == 2
+    assert stats.message_counts == {'Disk full': 1, 'Recovered': 1}
+
+def test_analyze_file_cached_options_change_rebuilds(sample_basic_file):
+    analyze_file_cached(sample_basic_file)
+    stats = analyze_file_cached(sample_basic_file, message_capacity=3)
+    assert stats.is_approximate
+    assert stats.total == 5
+
+def test_lazy_log_parser_reuses_cached_offsets(tmp_path):
+    log_file = tmp_path / 'app.log'
+    log_file.write_text("2025-10-16 09:23:15 ERROR Disk full\n2025-10-16 09:23:16 INFO Started\n")
+    analyze_file_cached(str(log_file))
+    with open(log_file, 'a') as f:
+        f.write("2025-10-16 09:23:17 WARNING Disk almost full\n")
+    lazy_parser = LogParser(str(log_file), lazy=True, cache_path=str(log_file) + '.lacache')
+    assert len(lazy_parser) == 3
+    assert lazy_parser[-1].message == 'Disk almost full'
+    lazy_parser.close()
+
+def test_parse_bytes_matches_parse_log():
+    line = "2025-10-16 09:23:15 ERROR Database  connection failed: timeout after 30s"
+    assert DEFAULT_FORMAT.parse_bytes(line.encode() + b"\r\n") == LogEntry.parse_log(line)
+    assert LogEntry.parse_log(line)[2] == "Database  connection failed: timeout after 30s"
+
+def test_parse_bytes_shares_decoded_strings():
+    first = DEFAULT_FORMAT.parse_bytes(b"2025-10-16 09:23:15 ERROR Disk full\n")
+    second = DEFAULT_FORMAT.parse_bytes(b"2025-10-16 09:23:15 ERROR Disk full\n")
+    assert all(a is b for a, b in zip(first, second))
+
+def test_log_parser_interns_past_the_parser_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(DEFAULT_FORMAT, 'cache_size', 4)
+    log_file = tmp_path / 'repeats.log'
+    log_file.write_text(''.join(f"2025-10-16 09:23:{i % 3:02d} INFO Request {i % 10} completed\n" for i in range(40)))
+    store = LogParser(str(log_file))._store
+    messages, timestamps = store.messages, store.timestamps
+    assert messages[3] == messages[33] and messages[3] is messages[33]
+    assert timestamps[1] is timestamps[31]
+
+def test_parse_bytes_malformed_line():
+    with pytest.raises(ValueError, match="Malformed log entry: 10/15/25 ERROR"):
+        DEFAULT_FORMAT.parse_bytes(b"10/15/25 ERROR\n")
+    with pytest.raises(ValueError, match="Malformed log entry: 10/15/25 ERROR"):
+        LogEntry.parse_log("10/15/25 ERROR")
+
+def test_log_parser_malformed_file(sample_malformed_log):
+    with pytest.raises(ValueError):
+        LogParser(sample_malformed_log)
+
+def test_query_levels_uses_posting_lists(sample_basic_file, monkeypatch):
+    log_parser = LogParser(sample_basic_file)
+    monkeypatch.setattr(LevelIn, 'compile', lambda self: pytest.fail('pure level query evaluated a predicate'))
+    matches = list(log_parser.query(LevelIn('ERROR', 'DEBUG')))
+    assert [entry.level for entry in matches] == ['ERROR', 'ERROR', 'DEBUG']
+
+def test_query_level_postings_in_file_order(sample_basic_file):
+    log_parser = LogParser(sample_basic_file)
+    matches = list(log_parser.query(LevelIn('ERROR', 'DEBUG', 'UNKNOWN')))
+    assert [entry.level for entry in matches] == ['ERROR', 'ERROR', 'DEBUG']
+    assert list(log_parser.query(LevelIn('UNKNOWN'))) == []
+
+def test_query_combined_predicates(sample_basic_file):
+    log_parser = LogParser(sample_basic_file)
+    query = (LevelIn('ERROR', 'WARNING') | Contains('request')) & TimeRange("2025-10-16 09:23:16", None)
+    assert [entry.timestamp for entry in log_parser.query(query)] == [
+        "2025-10-16 09:23:18", "2025-10-16 09:23:21", "2025-10-16 09:24:10",
+    ]
+
+def test_query_negation_and_regex(sample_basic_file):
+    log_parser = LogParser(sample_basic_file)
+    assert [entry.level for entry in log_parser.query(~LevelIn('ERROR'))] == ['WARNING', 'INFO', 'DEBUG']
+    assert [entry.message for entry in log_parser.query(Matches(r'attempt \d+ of \d+'))] == [
+        "Retrying connection attempt 1 of 3",
+    ]
+    assert len(list(log_parser.query(~Matches('connection')))) == 2
+
+def test_query_is_a_generator(sample_basic_file):
+    log_parser = LogParser(sample_basic_file)
+    matches = log_parser.query(Contains('connection'))
+    assert next(matches).timestamp == "2025-10-16 09:23:15"
+
+def test_query_lazy_parser_matches_eager(sample_basic_file):
+    query = LevelIn('ERROR') & TimeRange("2025-10-16 09:23:20", "2025-10-16 09:30:00")
+    lazy_parser = LogParser(sample_basic_file, lazy=True)
+    assert list(lazy_parser.query(query)) == list(LogParser(sample_basic_file).query(query))
+    lazy_parser.close()
+
+def test_log_analyzer_query_on_entry_list(sample_basic_file):
+    log_analyzer = LogAnalyzer(LogParser(sample_basic_file)[:])
+    assert len(list(log_analyzer.query(LevelIn('ERROR') & Contains('timeout')))) == 2
+    assert len(log_analyzer.filter_by_level('WARNING')) == 1
+
+def test_build_query():
+    assert build_query() is None
+    query = build_query(levels='ERROR,CRITICAL', contains='disk', invert=True)
+    predicate = query.compile()
+    assert predicate(0.0, 'ERROR', 'disk full') is False
+    assert predicate(0.0, 'INFO', 'disk full') is True
+
+def test_log_parser_skip_malformed(tmp_path):
+    log_file = tmp_path / 'mixed.log'
+    log_file.write_text(
+        "2025-10-16 09:23:15 ERROR Database connection failed\n"
+        "garbage\n"
+        "2025-10-16 09:23:18 INFO Request completed\n"
+    )
+    log_parser = LogParser(str(log_file), skip_malformed=True)
+    assert len(log_parser) == 2
+    assert log_parser.malformed_count == 1
+    assert log_parser[1].message == 'Request completed'
+
+def test_parallel_and_cached_analysis_skip_malformed(tmp_path):
+    log_file = tmp_path / 'mixed.log'
+    log_file.write_text(
+        "2025-10-16 09:23:15 ERROR Database connection failed\n"
+        "\n"
+        "garbage\n"
+        "2025-10-16 09:23:18 INFO Request completed\n"
+    )
+    for analyze in [lambda **kwargs: analyze_file_parallel(str(log_file), 2, **kwargs),
+                    lambda **kwargs: analyze_file_cached(str(log_file), **kwargs)]:
+        with pytest.raises(ValueError):
+            analyze()
+        stats = analyze(skip_malformed=True)
+        assert stats.total == 2
+        assert stats.malformed_count == 2
+    # The counts are cached with the malformed lines, and a strict run still fails
+    assert analyze_file_cached(str(log_file), skip_malformed=True).malformed_count == 2
+    with pytest.raises(ValueError):
+        analyze_file_cached(str(log_file))
+
+def test_instrumentation_records_pipeline_stages(sample_basic_file):
+    finished = []
+    instrumentation = Instrumentation(on_stage=lambda record: finished.append(record.name))
+    log_parser = LogParser(sample_basic_file, instrumentation=instrumentation)
+    analyzer = LogAnalyzer(log_parser, instrumentation=instrumentation)
+    assert analyzer.error_count == 2
+    log_parser.between('2025-10-16 09:23:00', '2025-10-16 09:24:00')
+
+    assert finished == ['read', 'parse', 'aggregate', 'time index']
+    stages = instrumentation.stages
+    assert stages['parse'].lines == 5
+    assert stages['read'].bytes == os.path.getsize(sample_basic_file)
+    assert stages['aggregate'].lines == 5
+    assert instrumentation.counters['malformed lines'] == 0
+
+def test_instrumented_parse_matches_plain_parse(sample_variable_messages_file):
+    plain = LogParser(sample_variable_messages_file)
+    instrumented = LogParser(sample_variable_messages_file, instrumentation=Instrumentation())
+    assert list(instrumented) == list(plain)
+
+def test_timed_lines_rejoins_lines_split_across_chunks():
+    data = b"2025-10-16 09:23:15 ERROR a\n2025-10-16 09:23:18 INFO bb\nlast"
+    read_totals = [0.0, 0]
+    lines = list(_timed_lines(io.BytesIO(data), read_totals, chunk_size=7))
+    assert lines == data.split(b"\n")
+    assert read_totals[1] == len(data)
+
+def test_log_parser_slice_is_a_view(sample_basic_file):
+    log_parser = LogParser(sample_basic_file)
+    view = log_parser[1:5]
+    assert isinstance(view, LogParserView)
+    assert len(view) == 4
+    assert view[0] == log_parser[1]
+    assert view[-1] == log_parser[4]
+    assert list(view) == list(log_parser)[1:5]
+    assert view[::2] == [log_parser[1], log_parser[3]]
+    assert view[::-1][0] == log_parser[4]
+    assert len(view[10:]) == 0
+    with pytest.raises(IndexError):
+        _ = view[4]
+    with pytest.raises(ValueError):
+        _ = view['invalid']
+
+def test_log_parser_view_analysis(sample_basic_file):
+    log_parser = LogParser(sample_basic_file)
+    for view in [log_parser[1:4], log_parser[::2], log_parser[::-1], LogParser(sample_basic_file, lazy=True)[1:4]]:
+        entries = list(view)
+        analyzer = LogAnalyzer(view)
+        expected = LogAnalyzer(entries)
+        assert analyzer.log_levels == expected.log_levels
+        assert analyzer.top_messages(2) == expected.top_messages(2)
+        assert analyzer.filter_by_level('ERROR') == expected.filter_by_level('ERROR')
+        query = LevelIn('ERROR', 'INFO') & TimeRange('2025-10-16 09:23:16', None)
+        assert list(analyzer.query(query)) == list(expected.query(query))
+        assert analyzer.level_histogram('minute') == expected.level_histogram('minute')
+        assert analyzer.time_slice('2025-10-16 09:23:16', '2025-10-16 09:24:00').log_levels == \
+            expected.time_slice('2025-10-16 09:23:16', '2025-10-16 09:24:00').log_levels
+
+def test_merge_by_time(tmp_path):
+    web = tmp_path / 'web.log'
+    web.write_text(
+        "2025-10-16 09:00:00 INFO web started\n"
+        "2025-10-16 09:00:05 ERROR web failed\n"
+        "not-a-time --:--:-- WARNING web clock skew\n"
+        "2025-10-16 09:00:09 INFO web recovered\n"
+    )
+    db = tmp_path / 'db.log'
+    db.write_text(
+        "2025-10-16 09:00:01 INFO db started\n"
+        "2025-10-16 09:00:05 WARNING db slow query\n"
+        "2025-10-16 09:00:20 INFO db checkpoint\n"
+    )
+    web_parser, db_parser = LogParser(str(web)), LogParser(str(db))
+    cache_entries = [LogEntry.from_fields('2025-10-16 09:00:07', 'DEBUG', 'cache miss')]
+
+    merged = list(merge_by_time(web_parser, db_parser[:], cache_entries))
+    assert [entry.message for entry in merged] == [
+        'web started', 'db started', 'web failed', 'web clock skew', 'db slow query',
+        'cache miss', 'web recovered', 'db checkpoint',
+    ]
+    assert LogAnalyzer(merged).log_count == 8
+
+def test_merge_by_time_is_lazy(sample_basic_file):
+    consumed = []
+
+    def tracked(entries):
+        for entry in entries:
+            consumed.append(entry)
+            yield entry
+
+    merged = merge_by_time(tracked(LogParser(sample_basic_file)), tracked(LogParser(sample_basic_file)))
+    assert next(merged).timestamp == "2025-10-16 09:23:15"
+    assert len(consumed) <= 3
+
+@pytest.fixture
+def syslog_file(tmp_path):
+    log_file = tmp_path / 'syslog'
+    log_file.write_text(
+        "<11>Oct 16 09:23:15 web1 nginx[42]: upstream timed out\n"
+        "Oct 16 09:23:16 web1 sshd[7]: Accepted publickey for deploy\n"
+        "<12>Oct 16 09:23:17 db1 postgres[9]: checkpoint delayed\n"
+    )
+    return str(log_file)
+
+def test_log_parser_with_format(syslog_file):
+    syslog = SyslogFormat(year=2025)
+    for log_parser in [LogParser(syslog_file, log_format=syslog), LogParser(syslog_file, lazy=True, log_format=syslog)]:
+        assert len(log_parser) == 3
+        assert log_parser[0] == LogEntry.from_fields('2025-10-16 09:23:15', 'ERROR', 'web1 nginx[42]: upstream timed out')
+        assert [entry.level for entry in log_parser] == ['ERROR', 'INFO', 'WARNING']
+        assert len(log_parser.between('2025-10-16 09:23:16', '2025-10-16 09:24:00')) == 2
+    assert LogEntry("Oct 16 09:23:16 web1 sshd[7]: ok", syslog).level == 'INFO'
+
+def test_log_parser_detects_format(syslog_file, sample_basic_file, tmp_path):
+    assert LogParser(syslog_file, log_format='auto').log_format.name == 'syslog'
+    assert LogParser(sample_basic_file, log_format='auto').log_format.name == 'default'
+
+    json_file = tmp_path / 'app.jsonl'
+    json_file.write_text('{"ts": 1760606595, "level": "error", "msg": "Disk full"}\n'
+                         'garbage\n'
+                         '{"ts": 1760606596, "level": "info", "msg": "Recovered"}\n')
+    log_parser = LogParser(str(json_file), log_format='auto', skip_malformed=True)
+    assert log_parser.malformed_count == 1
+    assert LogAnalyzer(log_parser).log_levels == {'ERROR': 1, 'INFO': 1}
+    with pytest.raises(ValueError):
+        LogParser(str(json_file), log_format='jsonl')
+    with pytest.raises(ValueError):
+        LogParser(str(json_file), log_format='no-such-format')
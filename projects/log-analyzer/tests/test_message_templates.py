@@ -0,0 +1,34 @@
+from message_templates import TemplateMiner
+
+def test_numbers_are_masked():
+    miner = TemplateMiner()
+    assert miner.template("Slow query detected 812ms") == "Slow query detected <NUM>ms"
+    assert miner.template("Slow query detected 95ms") == "Slow query detected <NUM>ms"
+    assert miner.template("Retrying connection attempt 1 of 3") == "Retrying connection attempt <NUM> of <NUM>"
+    assert miner.template("Processing user request id=12345") == "Processing user request id=<NUM>"
+
+def test_ids_and_addresses_are_masked():
+    miner = TemplateMiner()
+    assert miner.template("Request 123e4567-e89b-12d3-a456-426614174000 failed") == "Request <UUID> failed"
+    assert miner.template("Connection from 10.0.0.12:5432 refused") == "Connection from <IP> refused"
+    assert miner.template("Segfault at 0x7ffd3a2c") == "Segfault at <HEX>"
+    assert miner.template("Commit 9fceb02d0ae598e95dc970b74767f19372d61af8 deployed") == "Commit <HEX> deployed"
+
+def test_plain_words_are_kept():
+    miner = TemplateMiner()
+    assert miner.template("Application started successfully") == "Application started successfully"
+    assert miner.template("Upgraded to ipv6 stack") == "Upgraded to ipv6 stack"
+
+def test_templates_are_shared():
+    miner = TemplateMiner()
+    first = miner.template("Cache miss for key 1")
+    second = miner.template("Cache miss for key 2")
+    assert first is second
+    assert len(miner) == 1
+
+def test_cache_is_bounded():
+    miner = TemplateMiner(cache_size=10)
+    for i in range(100):
+        miner.template(f"job {i} done")
+    assert len(miner._cache) <= 10
+    assert len(miner) == 1
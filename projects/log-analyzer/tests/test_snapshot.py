@@ -0,0 +1,128 @@
+import pytest
+
+from log_analyzer import LogAnalyzer, LogParser, LevelIn, Contains, TimeRange
+from snapshot import SNAPSHOT_MAGIC, Snapshot
+
+@pytest.fixture
+def sample_log_file(tmp_path):
+    log_file = tmp_path / 'app.log'
+    log_file.write_text(
+        "2025-10-16 09:23:15 ERROR Database connection failed: timeout after 30s\n"
+        "2025-10-16 09:23:18 WARNING Retrying connection attempt 1 of 3\n"
+        "2025-10-16 09:23:21 ERROR Database connection failed: timeout after 30s\n"
+        "2025-10-16T09:23:22 INFO Application started successfully\n"
+        "2025-10-16 09:23:22.250 DEBUG Processing user request id=12345\n"
+        "yesterday noon: WARNING Clock not synchronised\n"
+        "2025-10-17 00:00:01 INFO Rotated naïve café log\n"
+    )
+    return str(log_file)
+
+def test_snapshot_round_trips_entries(sample_log_file, tmp_path):
+    snapshot_path = str(tmp_path / 'app.lasnap')
+    log_parser = LogParser(sample_log_file)
+    log_parser.save_snapshot(snapshot_path)
+
+    snapshot_parser = LogParser.from_snapshot(snapshot_path)
+    assert len(snapshot_parser) == len(log_parser)
+    assert list(snapshot_parser) == list(log_parser)
+    assert snapshot_parser[-1] == log_parser[-1]
+    snapshot_parser.close()
+
+def test_snapshot_stores_epochs_and_message_dictionary(sample_log_file, tmp_path):
+    snapshot_path = str(tmp_path / 'app.lasnap')
+    log_parser = LogParser(sample_log_file)
+    log_parser.save_snapshot(snapshot_path)
+
+    snapshot = Snapshot(snapshot_path)
+    assert len(snapshot) == 7
+    assert list(snapshot.epochs)[:3] == list(log_parser.epochs)[:3]
+    assert snapshot.message_ids[0] == snapshot.message_ids[2]
+    assert len(snapshot.message_bounds) == 7
+    assert [index for index in range(len(snapshot)) if snapshot.timestamp_override(index)] == [3, 4, 5]
+    assert snapshot.timestamp_override(5) == 'yesterday noon:'
+    assert snapshot.timestamp_override(0) is None
+    assert list(snapshot.posting(snapshot.level_names.index('ERROR'))) == [0, 2]
+    snapshot.close()
+
+def test_analysis_runs_on_snapshot_without_the_log(sample_log_file, tmp_path):
+    snapshot_path = str(tmp_path / 'app.lasnap')
+    expected = LogAnalyzer(LogParser(sample_log_file))
+    LogParser(sample_log_file).save_snapshot(snapshot_path)
+    (tmp_path / 'app.log').unlink()
+
+    log_parser = LogParser.from_snapshot(snapshot_path)
+    analyzer = LogAnalyzer(log_parser)
+    assert analyzer.log_levels == expected.log_levels
+    assert analyzer.top_messages(3) == expected.top_messages(3)
+    assert analyzer.filter_by_level('ERROR') == expected.filter_by_level('ERROR')
+    assert list(analyzer.query(LevelIn('INFO') | Contains('Retrying'))) == \
+        list(expected.query(LevelIn('INFO') | Contains('Retrying')))
+    assert list(analyzer.query(TimeRange('2025-10-16 09:23:20', None))) == \
+        list(expected.query(TimeRange('2025-10-16 09:23:20', None)))
+    assert log_parser.between('2025-10-16 09:23:16', '2025-10-16 09:23:23') == \
+        expected._log_parser.between('2025-10-16 09:23:16', '2025-10-16 09:23:23')
+    assert LogAnalyzer(log_parser, group_templates=True).top_messages(1) == \
+        LogAnalyzer(expected._log_parser, group_templates=True).top_messages(1)
+    log_parser.close()
+
+def test_snapshot_of_lazy_parser(sample_log_file, tmp_path):
+    snapshot_path = str(tmp_path / 'app.lasnap')
+    lazy_parser = LogParser(sample_log_file, lazy=True)
+    lazy_parser.save_snapshot(snapshot_path)
+    snapshot_parser = LogParser.from_snapshot(snapshot_path)
+    assert list(snapshot_parser) == list(lazy_parser)
+    lazy_parser.close()
+    snapshot_parser.close()
+
+def test_more_levels_than_fit_in_16_bits(tmp_path):
+    # e.g. a syslog-style file read with the default layout puts a host or pid in the level field
+    log_file = tmp_path / 'hosts.log'
+    log_file.write_text(''.join(f"Oct 16 host{i} sshd: accepted\n" for i in range(70_000)))
+    log_parser = LogParser(str(log_file))
+    assert len(LogAnalyzer(log_parser).log_levels) == 70_000
+    assert log_parser[-1].level == 'host69999'
+    assert list(log_parser.query(LevelIn('host69999', 'host3'))) == [log_parser[3], log_parser[-1]]
+
+    snapshot_path = str(tmp_path / 'hosts.lasnap')
+    log_parser.save_snapshot(snapshot_path)
+    snapshot_parser = LogParser.from_snapshot(snapshot_path)
+    assert snapshot_parser[-1] == log_parser[-1]
+    assert snapshot_parser[65_536].level == 'host65536'
+    snapshot_parser.close()
+
+def _header_length(snapshot_path):
+    with open(snapshot_path, 'rb') as snapshot_file:
+        snapshot_file.read(len(SNAPSHOT_MAGIC))
+        return int.from_bytes(snapshot_file.read(8), 'little')
+
+def test_original_timestamps_are_a_column_not_header(tmp_path):
+    header_lengths = []
+    for count in (10, 1_000):
+        log_file = tmp_path / f'iso{count}.log'
+        log_file.write_text(''.join(f"2025-10-16T09:{i // 60 % 60:02}:{i % 60:02} INFO: step {i % 3}\n"
+                                    for i in range(count)))
+        snapshot_path = str(tmp_path / f'iso{count}.lasnap')
+        log_parser = LogParser(str(log_file))
+        log_parser.save_snapshot(snapshot_path)
+        header_lengths.append(_header_length(snapshot_path))
+        snapshot_parser = LogParser.from_snapshot(snapshot_path)
+        assert list(snapshot_parser) == list(log_parser)
+        snapshot_parser.close()
+    # only the section offsets and the count grow a few digits
+    assert header_lengths[1] - header_lengths[0] < 100
+
+def test_snapshot_of_empty_log(tmp_path):
+    log_file = tmp_path / 'empty.log'
+    log_file.write_text('')
+    snapshot_path = str(tmp_path / 'empty.lasnap')
+    LogParser(str(log_file)).save_snapshot(snapshot_path)
+    snapshot_parser = LogParser.from_snapshot(snapshot_path)
+    assert len(snapshot_parser) == 0
+    assert LogAnalyzer(snapshot_parser).log_count == 0
+    snapshot_parser.close()
+
+def test_invalid_snapshot(sample_log_file, tmp_path):
+    with pytest.raises(ValueError):
+        LogParser.from_snapshot(sample_log_file)
+    with pytest.raises(FileNotFoundError):
+        LogParser.from_snapshot(str(tmp_path / 'missing.lasnap'))
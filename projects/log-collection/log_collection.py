@@ -1,3 +1,6 @@
+import heapq
+from operator import attrgetter
+
 class LogEntry:
     def __init__(self, log_entry: str):
         self._log_entry = log_entry
@@ -25,9 +28,14 @@ class LogCollection:
 	def __len__(self):
 		return len(self._logs)
 
+	@classmethod
+	def merge(cls, *collections, key=None):
+		"""Materialise merge_by_time(*collections) as a new LogCollection"""
+		return cls(list(merge_by_time(*collections, key=key)))
+
 	def __getitem__(self, location):
 		if isinstance(location, slice):
-			return [self._logs[i] for i in range(*location.indices(len(self._logs)))]
+			return LogCollectionView(self._logs, range(len(self._logs))[location])
 
 		if not isinstance(location, int):
 			raise ValueError(f"Invalid Index. Index must be an integer, not {type(location).__name__}")
@@ -37,6 +45,49 @@ class LogCollection:
 
 		return self._logs[location]
 
+class LogCollectionView:
+	"""Slice of a LogCollection that refers to its logs by index instead of copying them"""
+	def __init__(self, logs: list[LogEntry], indices: range):
+		self._logs = logs
+		self._indices = indices
+
+	def __repr__(self):
+		return f"LogCollectionView({list(self)})"
+
+	def __len__(self):
+		return len(self._indices)
+
+	def __iter__(self):
+		return map(self._logs.__getitem__, self._indices)
+
+	def __eq__(self, other):
+		if isinstance(other, (list, tuple, LogCollectionView)):
+			return list(self) == list(other)
+		return NotImplemented
+
+	def __getitem__(self, location):
+		if isinstance(location, slice):
+			return LogCollectionView(self._logs, self._indices[location])
+
+		if not isinstance(location, int):
+			raise ValueError(f"Invalid Index. Index must be an integer, not {type(location).__name__}")
+
+		if location < -len(self._indices) or location >= len(self._indices):
+			raise IndexError(f"Index {location} is out of bounds for LogCollectionView of length {len(self._indices)}")
+
+		return self._logs[self._indices[location]]
+
+def merge_by_time(*collections, key=None):
+	"""
+	Lazily merge collections that are each sorted by timestamp into one sorted stream.
+
+	Uses a heap holding one pending log per collection, so memory stays O(k)
+	for k collections. Logs with equal timestamps keep the order of their
+	collections. `key` defaults to the log's timestamp, whose
+	"YYYY-MM-DD HH:MM:SS" text sorts chronologically.
+	"""
+	return heapq.merge(*collections, key=key or attrgetter('timestamp'))
+
 if __name__ == '__main__':
 	log_collector = LogCollection([LogEntry('ERROR'), LogEntry('WARNING'), LogEntry('INFO'), LogEntry('DEBUG')])
 	print(log_collector)
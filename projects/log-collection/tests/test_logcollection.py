@@ -1,5 +1,5 @@
 import pytest
-from log_collection import LogCollection
+from log_collection import LogCollection, LogCollectionView, LogEntry, merge_by_time
 
 def test_valid_index():
     logs = LogCollection(['ERROR', 'WARNING', 'DEBUG'])
@@ -14,4 +14,41 @@ def test_out_of_bounds_index():
 def test_invalid_index_type():
     logs = LogCollection(['ERROR', 'WARNING', 'DEBUG'])
     with pytest.raises(ValueError):
-        _ = logs['invalid']
\ No newline at end of file
+        _ = logs['invalid']
+
+def test_slice_is_a_view():
+    logs = LogCollection(['ERROR', 'WARNING', 'DEBUG', 'INFO'])
+    window = logs[1:]
+    assert isinstance(window, LogCollectionView)
+    assert len(window) == 3
+    assert window[0] == 'WARNING'
+    assert window[-1] == 'INFO'
+    assert list(window) == ['WARNING', 'DEBUG', 'INFO']
+    assert window[::2] == ['WARNING', 'INFO']
+    assert logs[::-1] == ['INFO', 'DEBUG', 'WARNING', 'ERROR']
+
+def test_view_index_errors():
+    window = LogCollection(['ERROR', 'WARNING', 'DEBUG'])[1:]
+    with pytest.raises(IndexError):
+        _ = window[2]
+    with pytest.raises(ValueError):
+        _ = window['invalid']
+
+def test_merge_by_time():
+    web = LogCollection([LogEntry('2025-10-16 09:00:00 INFO web started'),
+                         LogEntry('2025-10-16 09:00:05 ERROR web failed')])
+    db = LogCollection([LogEntry('2025-10-16 09:00:01 INFO db started'),
+                        LogEntry('2025-10-16 09:00:05 WARNING db slow query'),
+                        LogEntry('2025-10-16 09:00:20 INFO db checkpoint')])
+    merged = merge_by_time(web, db[1:])
+    assert next(merged).message == 'web started'
+    assert [log.message for log in merged] == ['web failed', 'db slow query', 'db checkpoint']
+
+    combined = LogCollection.merge(web, db)
+    assert isinstance(combined, LogCollection)
+    assert [log.message for log in combined] == ['web started', 'db started', 'web failed',
+                                                 'db slow query', 'db checkpoint']
+
+def test_merge_by_time_with_key():
+    merged = LogCollection.merge(LogCollection(['a', 'c']), LogCollection(['b']), key=str)
+    assert list(merged) == ['a', 'b', 'c']
@@ -1,3 +1,5 @@
+import os
+import sys
 import pytest
 from pathlib import Path
 from tree_builder import build_tree
@@ -137,3 +139,59 @@ def test_deep_nesting(tmp_path):
     tree = build_tree(str(tmp_path))
 
     assert len(tree) == 9
+
+def test_children_in_listing_order(tmp_path):
+    """Test that children keep the order os.listdir reports them in"""
+    for name in ["b.txt", "a", "c.py", "d"]:
+        if '.' in name:
+            (tmp_path / name).touch()
+        else:
+            (tmp_path / name).mkdir()
+            (tmp_path / name / "inner.txt").touch()
+
+    tree = build_tree(str(tmp_path))
+
+    assert [child.name for child in tree.children] == os.listdir(tmp_path)
+    for child in tree.children:
+        assert child.is_file == (not (tmp_path / child.name).is_dir())
+
+def test_deeper_than_recursion_limit(tmp_path):
+    """Test that trees deeper than Python's recursion limit can be built"""
+    depth = sys.getrecursionlimit() + 100
+    path = tmp_path
+    for _ in range(depth):
+        path = path / "d"
+        path.mkdir()
+
+    try:
+        node = build_tree(str(tmp_path))
+        levels = 0
+        while node.children:
+            node = node.children[0]
+            levels += 1
+
+        assert levels == depth
+    finally:
+        # shutil.rmtree recurses too, so pytest couldn't clean this up later
+        while path != tmp_path:
+            path.rmdir()
+            path = path.parent
+
+def test_symlink_loop(tmp_path):
+    """Test that a symlink to an ancestor directory is not followed forever"""
+    subdir = tmp_path / "subdir"
+    subdir.mkdir()
+    (subdir / "file.txt").touch()
+    (subdir / "back").symlink_to(tmp_path)
+    (tmp_path / "link_to_subdir").symlink_to(subdir)
+
+    tree = build_tree(str(tmp_path))
+
+    subdir_node = [c for c in tree.children if c.name == "subdir"][0]
+    back = [c for c in subdir_node.children if c.name == "back"][0]
+    assert not back.is_file and back.is_leaf()
+
+    # Symlinks to directories elsewhere are still followed
+    link = [c for c in tree.children if c.name == "link_to_subdir"][0]
+    assert {c.name for c in link.children} == {"file.txt", "back"}
+
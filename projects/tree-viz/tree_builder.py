@@ -1,9 +1,26 @@
 import os
+import stat
 from tree_node import TreeNode
 
+def _links_to_ancestor(entry: os.DirEntry, depth: int) -> bool:
+    """Return True if a symlinked directory points at one of the `depth + 1` directories above it"""
+    target = entry.stat()
+    directory = os.path.dirname(entry.path)
+    for _ in range(depth + 1):
+        ancestor = os.stat(directory)
+        if (ancestor.st_dev, ancestor.st_ino) == (target.st_dev, target.st_ino):
+            return True
+        directory = os.path.dirname(directory)
+    return False
+
 def build_tree(path: str) -> TreeNode:
     """
     Build a tree structure from a file system path.
+
+    Directories are listed with os.scandir, whose entries already know their
+    type, so only symlinks cost an extra stat. Symlinked directories are
+    followed, except ones pointing back at their own ancestors, which would
+    never end; those are shown as empty directories.
     
     Args:
         path: Path to file or directory
@@ -14,22 +31,34 @@ def build_tree(path: str) -> TreeNode:
     Raises:
         FileNotFoundError: If path doesn't exist
     """
-    if not os.path.exists(path):
+    # One stat for the root; every other entry's type comes from the directory listing
+    try:
+        root_stat = os.stat(path)
+    except (OSError, ValueError):  # what os.path.exists treats as missing
         raise FileNotFoundError(f"{path} directory/file does not exist.")
-    
+
     # case where input path is a single file
-    if not os.path.isdir(path):
+    if not stat.S_ISDIR(root_stat.st_mode):
         return TreeNode(os.path.basename(path), True)
-    else:
-        root = TreeNode(os.path.basename(path))
 
-        for object in os.listdir(path):
-            full_path = os.path.join(path, object)
+    root = TreeNode(os.path.basename(path))
 
-            if os.path.isdir(full_path):
-                root.add_child(build_tree(full_path))
-            else:
-                root.add_child(TreeNode(os.path.basename(full_path), True))
+    # Walk with an explicit stack instead of recursion so very deep trees
+    # don't hit the recursion limit; children are still added in listing order
+    stack = [(path, root, 0)]
+    while stack:
+        directory, node, depth = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                # DirEntry.is_dir() uses the type scandir already read (it only
+                # stats symlinks, which it follows like os.path.isdir)
+                if entry.is_dir():
+                    child = TreeNode(entry.name)
+                    if not (entry.is_symlink() and _links_to_ancestor(entry, depth)):
+                        stack.append((entry.path, child, depth + 1))
+                else:
+                    child = TreeNode(entry.name, True)
+                node.add_child(child)
 
     return root
 
@@ -0,0 +1,123 @@
+"""
+Throughput and peak-memory benchmarks for the word counter's tokenizers.
+
+Generates (or reuses) a synthetic ASCII corpus with Zipf-distributed words and
+punctuation, checks that both tokenizers count it identically, then times the
+text and mmap tokenizers, in memory, streaming and in parallel:
+
+    python benchmarks/bench_word_counter.py --size-mb 500
+    python benchmarks/bench_word_counter.py --input corpus.txt --repeat 1
+"""
+import argparse
+import gc
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from word_counter import WordCounter, count_paths
+
+def write_corpus(path: str, size_mb: float, vocabulary: int = 50_000, zipf: float = 1.1, seed: int = 42) -> None:
+    """Write about `size_mb` MB of lines of Zipf-distributed words, some capitalised or punctuated"""
+    rng = random.Random(seed)
+    words = [''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(2, 10))) for _ in range(vocabulary)]
+    words[:len(WordCounter.STOPWORDS)] = sorted(WordCounter.STOPWORDS)
+    weights = [1 / rank ** zipf for rank in range(1, vocabulary + 1)]
+    decorations = [lambda word: word, str.capitalize, lambda word: word + ',', lambda word: word + '.',
+                   lambda word: f'"{word}"', str.upper]
+    decoration_weights = [80, 8, 5, 4, 2, 1]
+
+    target = int(size_mb * 1e6)
+    written = 0
+    with open(path, 'w') as corpus:
+        while written < target:
+            sample = rng.choices(words, weights, k=10_000)
+            decorated = [decorate(word) for decorate, word
+                         in zip(rng.choices(decorations, decoration_weights, k=len(sample)), sample)]
+            text = '\n'.join(' '.join(decorated[i:i + 12]) for i in range(0, len(decorated), 12)) + '\n'
+            corpus.write(text)
+            written += len(text)
+
+def measure(name: str, func: Callable[[], object], size: int, words: int, repeat: int = 3,
+            track_memory: bool = True) -> Dict[str, object]:
+    """Time func (best of `repeat` runs) and, in a separate run, its peak traced memory"""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    seconds = min(timings)
+
+    peak = None
+    if track_memory:
+        gc.collect()
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {
+        'name': name,
+        'seconds': seconds,
+        'words_per_second': words / seconds if seconds else None,
+        'mb_per_second': size / 1e6 / seconds if seconds else None,
+        'peak_memory_mb': peak / 1e6 if peak is not None else None,
+    }
+
+def run_benchmarks(corpus_path: str, repeat: int, workers: int) -> List[Dict[str, object]]:
+    size = os.path.getsize(corpus_path)
+    text_counts = WordCounter(corpus_path, streaming=True).word_counts()
+    mmap_counts = WordCounter(corpus_path, tokenizer='mmap').word_counts()
+    if list(text_counts.items()) != list(mmap_counts.items()):
+        raise AssertionError("The text and mmap tokenizers disagree on this corpus")
+    words = sum(text_counts.values())
+
+    benchmarks = {
+        "WordCounter().top_words()": lambda: WordCounter(corpus_path).top_words(),
+        "WordCounter(streaming=True).top_words()": lambda: WordCounter(corpus_path, streaming=True).top_words(),
+        "WordCounter(tokenizer='mmap').top_words()": lambda: WordCounter(corpus_path, tokenizer='mmap').top_words(),
+    }
+    results = [measure(name, func, size, words, repeat) for name, func in benchmarks.items()]
+    for tokenizer in ['text', 'mmap']:
+        results.append(measure(f"count_paths(workers={workers}, tokenizer='{tokenizer}')",
+                               lambda: count_paths(corpus_path, workers, tokenizer=tokenizer),
+                               size, words, repeat, track_memory=False))
+    return results
+
+def print_results(results: List[Dict[str, object]], baseline: Optional[float] = None) -> None:
+    header = f"{'benchmark':<48} {'seconds':>9} {'words/s':>12} {'MB/s':>8} {'peak MB':>9} {'speedup':>8}"
+    print(header)
+    print('-' * len(header))
+    baseline = baseline or results[0]['seconds']
+    for result in results:
+        peak = result['peak_memory_mb']
+        print(f"{result['name']:<48} {result['seconds']:>9.4f} {result['words_per_second']:>12,.0f} "
+              f"{result['mb_per_second']:>8.1f} {peak if peak is not None else float('nan'):>9.1f} "
+              f"{baseline / result['seconds']:>7.2f}x")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the word counter tokenizers.')
+    parser.add_argument('--input', help='Existing ASCII text file to benchmark instead of generating one')
+    parser.add_argument('--size-mb', type=float, default=100, help='Size of the generated corpus')
+    parser.add_argument('--vocabulary', type=int, default=50_000, help='Distinct words in the generated corpus')
+    parser.add_argument('--zipf', type=float, default=1.1, help='Word frequency skew')
+    parser.add_argument('--seed', type=int, default=42, help='Generator seed')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per benchmark; the fastest is reported')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Workers for the parallel benchmarks')
+
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        corpus_path = args.input
+        if corpus_path is None:
+            corpus_path = os.path.join(temp_dir, 'corpus.txt')
+            write_corpus(corpus_path, args.size_mb, args.vocabulary, args.zipf, args.seed)
+        print_results(run_benchmarks(corpus_path, args.repeat, args.workers))
@@ -0,0 +1,39 @@
+import pytest
+from heavy_hitters import SpaceSaving
+
+def test_exact_while_under_capacity():
+    sketch = SpaceSaving(10)
+    for word in ['python', 'code', 'python', 'test', 'python', 'code']:
+        sketch.add(word)
+    assert sketch.top(2) == [('python', 3, 0), ('code', 2, 0)]
+    assert sketch.error_bound == 0
+    assert sketch.total == 6
+
+def test_weighted_adds_stay_within_bounds():
+    sketch = SpaceSaving(5)
+    for i in range(500):
+        sketch.add('python', 3)
+        sketch.add(f"word{i}", 1)
+    assert len(sketch) == 5
+    word, count, error = sketch.top(1)[0]
+    assert word == 'python'
+    assert count - error <= 1500 <= count
+    assert sketch.error_bound <= sketch.total // sketch.capacity
+
+def test_merge():
+    first, second = SpaceSaving(4), SpaceSaving(4)
+    for i in range(100):
+        first.add('python')
+        second.add('python')
+        second.add('code')
+        first.add(f"noise{i}")
+    first.merge(second)
+    assert first.total == 400
+    assert len(first) <= 4
+    word, count, error = first.top(1)[0]
+    assert word == 'python'
+    assert count - error <= 200 <= count
+
+def test_invalid_capacity():
+    with pytest.raises(ValueError):
+        SpaceSaving(0)
@@ -1,5 +1,10 @@
+import io
+import os
 import pytest
-from word_counter import WordCounter
+from collections import Counter
+from word_counter import (WordCounter, WordIndex, count_paths, count_words, count_words_mmap, expand_paths, most_common, read_word_chunks,
+                          sketch_paths, sketch_words, _split_byte_ranges)
+from word_index import index_files
 
 @pytest.fixture
 def basic_temp_file(tmp_path):
@@ -69,4 +74,175 @@ def test_stopwords_filtered(stopwords_temp_file):
     assert 'the' not in words
     assert 'and' not in words
     assert 'are' not in words
-    
\ No newline at end of file
+
+def test_streaming_matches_in_memory(basic_temp_file, punct_temp_file, stopwords_temp_file, empty_file):
+    for path in [basic_temp_file, punct_temp_file, stopwords_temp_file, empty_file]:
+        expected = WordCounter(path).top_words()
+        for chunk_size in [1, 3, 1024]:
+            assert WordCounter(path, streaming=True, chunk_size=chunk_size).top_words() == expected
+
+def test_streaming_file_not_found():
+    with pytest.raises(FileNotFoundError):
+        WordCounter('no_file.txt', streaming=True)
+
+def test_read_word_chunks_never_splits_words():
+    chunks = list(read_word_chunks(io.StringIO("alpha beta\ngamma  delta"), chunk_size=4))
+    assert ''.join(chunks) == "alpha beta\ngamma  delta"
+    assert [chunk.split() for chunk in chunks] == [['alpha'], ['beta'], ['gamma'], ['delta']]
+
+def test_count_words():
+    counts = count_words(["The cat, the dog.", "CAT!"], WordCounter.STOPWORDS)
+    assert list(counts.items()) == [('cat', 2), ('dog', 1)]
+
+@pytest.fixture
+def corpus_dir(tmp_path):
+    corpus = tmp_path / 'corpus'
+    (corpus / 'b').mkdir(parents=True)
+    (corpus / 'a.txt').write_text("python is cool\n" * 50 + "naïve café\n")
+    (corpus / 'b' / 'c.txt').write_text("coding is neat\npython rocks\n")
+    (corpus / 'b' / 'd.txt').write_text("")
+    return corpus
+
+def test_expand_paths(corpus_dir):
+    assert expand_paths(str(corpus_dir)) == [str(corpus_dir / 'a.txt'), str(corpus_dir / 'b' / 'c.txt'),
+                                             str(corpus_dir / 'b' / 'd.txt')]
+    with pytest.raises(FileNotFoundError):
+        expand_paths([str(corpus_dir), 'no_file.txt'])
+
+def test_split_byte_ranges(basic_temp_file):
+    ranges = _split_byte_ranges(basic_temp_file, 3)
+    with open(basic_temp_file, 'rb') as f:
+        data = f.read()
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+    assert all(data[end - 1:end] == b'\n' for _, end in ranges[:-1])
+
+def test_count_paths_matches_word_counter(corpus_dir):
+    expected = WordCounter(str(corpus_dir / 'a.txt')).word_counts()
+    expected.update(WordCounter(str(corpus_dir / 'b' / 'c.txt')).word_counts())
+    assert list(count_paths(str(corpus_dir)).items()) == list(expected.items())
+    # Tiny chunks split a.txt into byte ranges across the pool
+    parallel = count_paths([str(corpus_dir)], workers=2, chunk_size=64)
+    assert list(parallel.items()) == list(expected.items())
+    assert most_common(parallel, 2) == [('python', 51), ('cool', 50)]
+
+def test_most_common_keeps_first_appearance_order_for_ties():
+    counts = Counter({'b': 2, 'a': 3, 'c': 2, 'd': 1, 'e': 2})
+    assert most_common(counts, 3) == [('a', 3), ('b', 2), ('c', 2)]
+    assert most_common(counts, 10) == sorted(counts.items(), key=lambda x: x[1], reverse=True)
+
+def test_approximate_top_words(stopwords_temp_file, tmp_path):
+    assert WordCounter(stopwords_temp_file).approximate_top_words(2) == [('cat', 2, 0), ('dog', 1, 0)]
+
+    big_file = tmp_path / 'big.txt'
+    big_file.write_text(' '.join(f"python word{i} code" if i % 2 else f"python word{i}" for i in range(2000)))
+    for counter in [WordCounter(str(big_file)), WordCounter(str(big_file), streaming=True, chunk_size=100)]:
+        top = counter.approximate_top_words(2, capacity=10)
+        assert [word for word, _, _ in top] == ['python', 'code']
+        for (word, count, error), true_count in zip(top, [2000, 1000]):
+            assert count - error <= true_count <= count
+
+def test_sketch_paths(corpus_dir):
+    sketch = sketch_paths(str(corpus_dir), capacity=3, workers=2, chunk_size=64)
+    assert sketch.top(1)[0][0] == 'python'
+    # Both occur more than total / capacity times, so they are guaranteed to be tracked
+    for word, true_count in [('python', 51), ('cool', 50)]:
+        assert sketch.count(word) - sketch.error(word) <= true_count <= sketch.count(word)
+    assert sketch.total == sum(count_paths(str(corpus_dir)).values())
+    assert sketch_words(["The cat, the dog."], 10, WordCounter.STOPWORDS).top(5) == [('cat', 1, 0), ('dog', 1, 0)]
+
+def test_word_index_updates_incrementally(corpus_dir, tmp_path):
+    index_path = str(tmp_path / 'corpus.wcindex')
+    index = WordIndex()
+    summary = index.update(str(corpus_dir))
+    assert len(summary['added']) == 3 and not summary['changed'] and not summary['removed']
+    assert list(index.word_counts().items()) == list(count_paths(str(corpus_dir)).items())
+    index.save(index_path)
+
+    index = WordIndex.load(index_path)
+    assert index.update(str(corpus_dir)) == {'added': [], 'changed': [], 'removed': []}
+
+    (corpus_dir / 'b' / 'c.txt').write_text("rust rocks rocks\n")
+    os.remove(corpus_dir / 'b' / 'd.txt')
+    (corpus_dir / 'e.txt').write_text("python\n")
+    summary = index.update(str(corpus_dir), workers=2)
+    assert summary == {'added': [str(corpus_dir / 'e.txt')], 'changed': [str(corpus_dir / 'b' / 'c.txt')],
+                       'removed': [str(corpus_dir / 'b' / 'd.txt')]}
+    assert list(index.word_counts().items()) == list(count_paths(str(corpus_dir)).items())
+    assert index.top_words(2) == [('python', 51), ('cool', 50)]
+
+def test_word_index_removes_deleted_files_under_current_directory(corpus_dir, monkeypatch):
+    monkeypatch.chdir(corpus_dir)
+    index = WordIndex()
+    index.update('.')
+    os.remove(os.path.join('b', 'd.txt'))
+    assert index.update('.') == {'added': [], 'changed': [], 'removed': [str(corpus_dir / 'b' / 'd.txt')]}
+    assert len(index) == 2
+
+def test_word_index_updates_from_another_directory(corpus_dir, monkeypatch):
+    monkeypatch.chdir(corpus_dir.parent)
+    index = WordIndex()
+    index.update('corpus')
+    expected = index.word_counts()
+
+    monkeypatch.chdir(corpus_dir / 'b')
+    assert index.update(str(corpus_dir)) == {'added': [], 'changed': [], 'removed': []}
+    assert index.update('..') == {'added': [], 'changed': [], 'removed': []}
+    assert len(index) == 3
+    assert index.word_counts() == expected
+
+def test_word_index_skips_its_own_files(corpus_dir):
+    index_path = str(corpus_dir / 'corpus.wcindex')
+    (corpus_dir / 'corpus.wcindex.tmp').write_text('{"fingerprint": "leftover"}')
+    index = WordIndex()
+    index.update(str(corpus_dir), exclude=index_files(index_path))
+    index.save(index_path)
+    summary = index.update(str(corpus_dir), exclude=index_files(index_path))
+    assert summary == {'added': [], 'changed': [], 'removed': []}
+    assert len(index) == 3
+    assert 'fingerprint' not in index.word_counts()
+
+def test_word_index_merge(corpus_dir, tmp_path):
+    other_dir = tmp_path / 'other'
+    other_dir.mkdir()
+    (other_dir / 'x.txt').write_text("python rust\n")
+    first, second = WordIndex(), WordIndex()
+    first.update(str(corpus_dir))
+    second.update(str(other_dir))
+    first.merge(second)
+    assert len(first) == 4
+    assert first.word_counts()['python'] == 52
+
+    # Files merged from elsewhere survive updates of this index's own directories
+    first.update(str(corpus_dir))
+    assert len(first) == 4
+
+    with pytest.raises(ValueError):
+        first.merge(WordIndex(stopwords=()))
+
+def test_word_index_ignores_index_with_other_stopwords(corpus_dir, tmp_path):
+    index_path = str(tmp_path / 'corpus.wcindex')
+    index = WordIndex(stopwords=())
+    index.update(str(corpus_dir))
+    index.save(index_path)
+    assert len(WordIndex.load(index_path, stopwords=())) == 3
+    assert len(WordIndex.load(index_path)) == 0
+
+def test_mmap_tokenizer_matches_text(basic_temp_file, upper_temp_file, punct_temp_file, stopwords_temp_file,
+                                     empty_file, tmp_path):
+    odd_whitespace = tmp_path / 'odd_whitespace.txt'
+    odd_whitespace.write_bytes(b"it's a-b\r\nend.\x0bx\x1cy\x1fz\tEnd --\x0c\n(end)")
+    for path in [basic_temp_file, upper_temp_file, punct_temp_file, stopwords_temp_file, empty_file, str(odd_whitespace)]:
+        expected = WordCounter(path).word_counts()
+        for block_size in [1, 4, 1024]:
+            counts = count_words_mmap(path, WordCounter.STOPWORDS, block_size=block_size)
+            assert list(counts.items()) == list(expected.items())
+        assert WordCounter(path, tokenizer='mmap').top_words() == WordCounter(path).top_words()
+
+def test_mmap_tokenizer_byte_ranges(corpus_dir):
+    expected = count_paths(str(corpus_dir))
+    assert list(count_paths(str(corpus_dir), workers=2, chunk_size=64, tokenizer='mmap').items()) == list(expected.items())
+    with pytest.raises(ValueError):
+        count_paths(str(corpus_dir), tokenizer='regex')
+    with pytest.raises(ValueError):
+        WordCounter(str(corpus_dir / 'a.txt'), tokenizer='regex')
+
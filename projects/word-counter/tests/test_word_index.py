@@ -0,0 +1,32 @@
+import os
+from word_index import file_fingerprint, load_index, refresh_fingerprint, save_index
+
+def test_save_and_load_round_trip(tmp_path):
+    index_path = str(tmp_path / 'corpus.wcindex')
+    save_index(index_path, {'files': {'a.txt': {'counts': {'python': 3}}}})
+    index = load_index(index_path)
+    assert index['files'] == {'a.txt': {'counts': {'python': 3}}}
+
+def test_load_missing_or_corrupt_index(tmp_path):
+    assert load_index(str(tmp_path / 'missing.wcindex')) is None
+    corrupt = tmp_path / 'corrupt.wcindex'
+    corrupt.write_text('not json')
+    assert load_index(str(corrupt)) is None
+    other_version = tmp_path / 'other.wcindex'
+    other_version.write_text('{"version": 0, "files": {}}')
+    assert load_index(str(other_version)) is None
+
+def test_refresh_fingerprint(tmp_path):
+    text_file = tmp_path / 'a.txt'
+    text_file.write_text("python is cool\n")
+    fingerprint = file_fingerprint(str(text_file))
+    assert refresh_fingerprint(str(text_file), None)[1]
+    assert refresh_fingerprint(str(text_file), fingerprint) == (fingerprint, False)
+
+    # Touched but identical contents: new fingerprint, counts still valid
+    os.utime(text_file, ns=(0, fingerprint['mtime_ns'] + 10**9))
+    touched, changed = refresh_fingerprint(str(text_file), fingerprint)
+    assert not changed and touched['mtime_ns'] != fingerprint['mtime_ns']
+
+    text_file.write_text("python is neat\n")
+    assert refresh_fingerprint(str(text_file), fingerprint)[1]
@@ -0,0 +1,56 @@
+import hashlib
+import json
+import os
+from typing import List, Optional, Tuple
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = '.wcindex'
+
+def content_hash(filepath: str) -> str:
+    """SHA-1 of a file's contents, read in blocks"""
+    digest = hashlib.sha1()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def file_fingerprint(filepath: str) -> dict:
+    """Identity of a file's contents: size, mtime and a hash of the whole file"""
+    stat = os.stat(filepath)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha1': content_hash(filepath)}
+
+def refresh_fingerprint(filepath: str, cached: Optional[dict]) -> Tuple[dict, bool]:
+    """
+    Fingerprint a file, returning it and whether the contents changed since `cached`.
+
+    An unchanged size and mtime is trusted without reading the file, so only
+    new or touched files are hashed. A touched file with the same hash keeps
+    its counts.
+    """
+    stat = os.stat(filepath)
+    if cached is not None and cached['size'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns:
+        return cached, False
+    fingerprint = file_fingerprint(filepath)
+    return fingerprint, cached is None or cached['sha1'] != fingerprint['sha1']
+
+def load_index(index_path: str) -> Optional[dict]:
+    """Read an index written by save_index, or None if it is missing, unreadable or from another version"""
+    try:
+        with open(index_path, 'r') as index_file:
+            index = json.load(index_file)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(index, dict) or index.get('version') != INDEX_VERSION:
+        return None
+    return index
+
+def index_files(index_path: str) -> List[str]:
+    """The index and the temporary file save_index writes it through, to leave out when counting a corpus"""
+    return [index_path, index_path + '.tmp']
+
+def save_index(index_path: str, index: dict) -> None:
+    """Atomically write an index as JSON"""
+    temp_path = index_path + '.tmp'
+    with open(temp_path, 'w') as index_file:
+        json.dump(dict(index, version=INDEX_VERSION), index_file)
+    os.replace(temp_path, index_path)